@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Values written in place of missing entries, as they appear in the sample datasets
+NULL_MARKERS = ['N/A', 'unknown', 'Not Available', '']
+
+BOOLEAN_PAIRS = [('yes', 'no'), ('true', 'false'), ('On', 'Off'), ('T', 'F'), ('Enabled', 'Disabled')]
+DURATION_UNITS = ['seconds', 'minutes', 'hours', 'days', 'weeks', 'months', 'years']
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m-%d-%Y', '%Y-%m-%dT%H:%M:%SZ']
+CATEGORY_WORDS = ['Spring', 'Summer', 'Autumn', 'Winter', 'Red', 'Blue', 'Green', 'Fruit', 'Meat', 'Dairy']
+
+# Inferred dtype for each generated column kind
+EXPECTED_DTYPES = {
+    'int8': 'int8',
+    'int16': 'int16',
+    'int32': 'int32',
+    'int64': 'int64',
+    'float32': 'float32',
+    'float64': 'float64',
+    'boolean': 'boolean',
+    'duration': 'timedelta64[ns]',
+    'datetime': 'datetime64[ns]',
+    'epoch_seconds': 'datetime64[ns]',
+    'epoch_milliseconds': 'datetime64[ns]',
+    'complex': 'complex128',
+    'category': 'category',
+    'text': 'object',
+}
+
+DEFAULT_MIX = list(EXPECTED_DTYPES)
+
+def expected_dtype(kind, values):
+    present = pd.Series(values)
+    present = present[~present.isin(NULL_MARKERS)]
+    if kind == 'text' and len(present) > 0 and present.nunique() / len(present) < 0.5:
+        return 'category'
+    # Missing entries come back as NaN, which integer dtypes cannot hold
+    if kind.startswith('int') and len(present) < len(values):
+        return 'float64'
+    return EXPECTED_DTYPES[kind]
+
+def _integers(rng, size, low, high):
+    values = rng.integers(low, high, size=size, endpoint=True)
+    # Pin both ends so the column needs exactly the intended width
+    values[:2] = [low, high]
+    return values.astype(str)
+
+def _pool(rng, kind, size):
+    if kind == 'int8':
+        return _integers(rng, size, -128, 127)
+    if kind == 'int16':
+        return _integers(rng, size, -32768, 32767)
+    if kind == 'int32':
+        return _integers(rng, size, -2147483648, 2147483647)
+    if kind == 'int64':
+        return _integers(rng, size, -2 ** 62, 2 ** 62)
+    if kind == 'float32':
+        return np.char.mod('%.3f', rng.uniform(-1e5, 1e5, size=size))
+    if kind == 'float64':
+        values = rng.uniform(-1e5, 1e5, size=size) * 1e300
+        return np.char.mod('%.17g', values)
+    if kind == 'boolean':
+        true_value, false_value = BOOLEAN_PAIRS[rng.integers(len(BOOLEAN_PAIRS))]
+        return np.array([true_value, false_value])
+    if kind == 'duration':
+        numbers = np.char.mod('%g', np.round(rng.uniform(0, 1000, size=size), 2))
+        units = rng.choice(DURATION_UNITS, size=size)
+        return np.char.add(np.char.add(numbers, ' '), units)
+    if kind == 'datetime':
+        dates = pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 365 * 30, size=size), unit='D')
+        return np.array(dates.strftime(DATE_FORMATS[rng.integers(len(DATE_FORMATS))]))
+    if kind == 'epoch_seconds':
+        return np.char.mod('%d.00', rng.integers(1_000_000_000, 2_000_000_000, size=size))
+    if kind == 'epoch_milliseconds':
+        return np.char.mod('%d.00', rng.integers(1_000_000_000_000, 2_000_000_000_000, size=size))
+    if kind == 'complex':
+        real = np.char.mod('%g', np.round(rng.uniform(-10, 10, size=size), 3))
+        imaginary = np.char.mod('%+gj', np.round(rng.uniform(-10, 10, size=size), 3))
+        return np.char.add(real, imaginary)
+    if kind == 'category':
+        return np.array(CATEGORY_WORDS[:max(2, min(size, len(CATEGORY_WORDS)))])
+    if kind == 'text':
+        return np.char.add('word-', rng.permutation(size).astype(str))
+    raise ValueError(f"Unknown column kind: {kind}")
+
+def generate_column(rng, kind, rows, null_ratio=0.0, cardinality=None):
+    size = rows if cardinality is None else max(1, min(cardinality, rows))
+    pool = _pool(rng, kind, size)
+    if kind == 'text' and cardinality is None:
+        values = pool.astype(object)
+    else:
+        values = pool[rng.integers(0, len(pool), size=rows)].astype(object)
+        # Keep every distinct value present so the inferred width does not depend on sampling
+        values[:min(len(pool), rows)] = pool[:rows]
+
+    if null_ratio > 0:
+        missing = rng.random(rows) < null_ratio
+        # The first rows hold the extreme values that fix the column's width
+        missing[:2] = False
+        values[missing] = rng.choice(NULL_MARKERS, size=int(missing.sum()))
+    return values
+
+def generate_dataframe(rows, columns, mix=None, null_ratio=0.0, cardinality=None, seed=0):
+    rng = np.random.default_rng(seed)
+    mix = mix or DEFAULT_MIX
+
+    data = {}
+    expected = {}
+    for index in range(columns):
+        kind = mix[index % len(mix)]
+        name = f"{kind}_{index}"
+        data[name] = generate_column(rng, kind, rows, null_ratio=null_ratio, cardinality=cardinality)
+        expected[name] = expected_dtype(kind, data[name])
+    return pd.DataFrame(data), expected
+
+def generate_csv(path_or_buffer, rows, columns, **kwargs):
+    dataframe, expected = generate_dataframe(rows, columns, **kwargs)
+    dataframe.to_csv(path_or_buffer, index=False)
+    return expected
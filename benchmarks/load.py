@@ -0,0 +1,304 @@
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import platform
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from benchmarks.generator import generate_csv
+
+RESULTS_FORMAT_VERSION = 1
+
+DEFAULT_URL = 'http://localhost:8000'
+
+# Synthetic traffic picks among these endpoints by weight
+ENDPOINTS = {
+    'infer': ('POST', '/type-detector/inferences/'),
+    'types': ('GET', '/type-detector/types/'),
+}
+DEFAULT_ENDPOINT_MIX = 'infer=9,types=1'
+
+PERCENTILES = (50, 95, 99)
+
+def multipart_body(file_name, content):
+    boundary = uuid.uuid4().hex
+    body = b''.join([
+        f'--{boundary}\r\n'.encode(),
+        f'Content-Disposition: form-data; name="file"; filename="{file_name}"\r\n'.encode(),
+        b'Content-Type: text/csv\r\n\r\n',
+        content,
+        f'\r\n--{boundary}--\r\n'.encode(),
+    ])
+    return body, f'multipart/form-data; boundary={boundary}'
+
+def make_request(name, method, path, file_name=None, content=None, offset=None):
+    request = {'name': name, 'method': method, 'path': path, 'body': None, 'content_type': None, 'offset': offset}
+    if content is not None:
+        request['body'], request['content_type'] = multipart_body(file_name, content)
+    return request
+
+def load_log(path):
+    # One JSON object per line: "path", optional "method", "file" to upload and "offset"
+    # in seconds from the start of the recording
+    requests = []
+    uploads = {}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            content = None
+            if entry.get('file') is not None:
+                if entry['file'] not in uploads:
+                    with open(entry['file'], 'rb') as upload:
+                        uploads[entry['file']] = upload.read()
+                content = uploads[entry['file']]
+            method = entry.get('method', 'POST' if content is not None else 'GET')
+            name = entry.get('name', entry['path'].split('?')[0])
+            requests.append(make_request(name, method, entry['path'], os.path.basename(entry.get('file') or ''), content, entry.get('offset')))
+    return requests
+
+def parse_mix(value):
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint: {name}. Use one of: {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+def synthetic_requests(count, weights, rows, columns, variants, query='', seed=0):
+    # A few distinct uploads, so repeats exercise the cache as real traffic would
+    uploads = []
+    for variant in range(variants):
+        buffer = io.StringIO()
+        generate_csv(buffer, rows, columns, seed=seed + variant)
+        uploads.append(buffer.getvalue().encode())
+
+    rng = np.random.default_rng(seed)
+    names = list(weights)
+    probabilities = np.array([weights[name] for name in names]) / sum(weights.values())
+    requests = []
+    for index, name in enumerate(rng.choice(names, size=count, p=probabilities)):
+        method, path = ENDPOINTS[name]
+        if method == 'POST':
+            path = f'{path}?{query}' if query else path
+            requests.append(make_request(name, method, path, f'synthetic_{index % variants}.csv', uploads[index % variants]))
+        else:
+            requests.append(make_request(name, method, path))
+    return requests
+
+def schedule(requests, rate=None, speed=1.0, seed=0):
+    # Recorded offsets are replayed as is, a rate draws Poisson arrivals, and with
+    # neither every request is sent as soon as a worker is free
+    if rate is not None:
+        gaps = np.random.default_rng(seed).exponential(1 / rate, size=len(requests))
+        return list(np.cumsum(gaps) - gaps[0])
+    if all(request['offset'] is not None for request in requests):
+        return [request['offset'] / speed for request in requests]
+    return [None] * len(requests)
+
+def send(base_url, request, timeout):
+    http_request = urllib.request.Request(base_url + request['path'], data=request['body'], method=request['method'])
+    if request['content_type'] is not None:
+        http_request.add_header('Content-Type', request['content_type'])
+    try:
+        with urllib.request.urlopen(http_request, timeout=timeout) as response:
+            response.read()
+            return response.status, None
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, None
+    except OSError as e:
+        return None, str(e)
+
+def process_rss(pid):
+    # The server and every worker process it started, from /proc so this stays Linux-only
+    pids = [pid]
+    total = 0
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                total += next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmRSS:'))
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total
+
+class RSSSampler(threading.Thread):
+    def __init__(self, pid, interval):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        started = time.perf_counter()
+        while not self.stopped.is_set():
+            self.samples.append([time.perf_counter() - started, process_rss(self.pid)])
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.samples
+
+def run_load(base_url, requests, concurrency, arrivals, timeout=60):
+    records = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def timed(request, arrival):
+        sent = time.perf_counter()
+        status, error = send(base_url, request, timeout)
+        finished = time.perf_counter()
+        # Open-loop latency counts from the planned arrival, so time spent waiting for
+        # a free client worker is not hidden when the server falls behind
+        since = started + arrival if arrival is not None else sent
+        with lock:
+            records.append({'name': request['name'], 'status': status, 'error': error, 'latency': finished - since, 'finished': finished - started})
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for request, arrival in zip(requests, arrivals):
+            if arrival is not None:
+                delay = started + arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            executor.submit(timed, request, arrival)
+    return records, time.perf_counter() - started
+
+def summarize(records, elapsed):
+    groups = {'all': records}
+    for record in records:
+        groups.setdefault(record['name'], []).append(record)
+
+    summary = {}
+    for name, group in groups.items():
+        latencies = np.array([record['latency'] for record in group])
+        errors = sum(1 for record in group if record['status'] is None or record['status'] >= 400)
+        statuses = {}
+        for record in group:
+            key = str(record['status']) if record['status'] is not None else 'failed'
+            statuses[key] = statuses.get(key, 0) + 1
+        summary[name] = {
+            'requests': len(group),
+            'throughput': len(group) / elapsed if elapsed else 0.0,
+            'error_rate': errors / len(group),
+            'statuses': statuses,
+            'mean': float(latencies.mean()),
+            **{f'p{percentile}': float(np.percentile(latencies, percentile)) for percentile in PERCENTILES},
+        }
+    return summary
+
+def compare(current, baseline, threshold):
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        # Higher latency and lower throughput are both slowdowns, though throughput
+        # only means something when requests were not paced at a fixed rate
+        checks = [('p95', result['p95'] / previous['p95'] if previous['p95'] else 1.0)]
+        if current['meta']['rate'] is None and baseline['meta']['rate'] is None:
+            checks.append(('throughput', previous['throughput'] / result['throughput'] if result['throughput'] else float('inf')))
+        for metric, ratio in checks:
+            marker = ''
+            if ratio > 1 + threshold:
+                regressions.append(f'{name}:{metric}')
+                marker = '  REGRESSION'
+            print(f"{name + ' ' + metric:44s} {previous[metric]:10.4f} -> {result[metric]:10.4f}  x{ratio:5.2f}{marker}")
+        if result['error_rate'] > previous['error_rate'] + threshold:
+            regressions.append(f'{name}:error_rate')
+            print(f"{name + ' error_rate':44s} {previous['error_rate']:10.2%} -> {result['error_rate']:10.2%}  REGRESSION")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay recorded or synthetic requests against a running server.')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--log', help='JSON lines request log to replay instead of synthetic traffic')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay a log this many times faster than recorded')
+    parser.add_argument('--mix', default=DEFAULT_ENDPOINT_MIX, help='Endpoint weights for synthetic traffic')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--columns', type=int, default=14)
+    parser.add_argument('--variants', type=int, default=4, help='Distinct synthetic uploads to cycle through')
+    parser.add_argument('--query', default='', help='Query string added to synthetic uploads, e.g. stream=1')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=None, help='Poisson arrivals per second, as fast as possible when omitted')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pid', type=int, default=None, help='Server process whose RSS is sampled, with its children')
+    parser.add_argument('--rss-interval', type=float, default=0.5)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    parser.add_argument('--baseline', help='Compare against a previous results file')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown against the baseline, 0.1 is 10%%')
+    args = parser.parse_args(argv)
+
+    if args.log:
+        requests = load_log(args.log)
+    else:
+        requests = synthetic_requests(args.requests, parse_mix(args.mix), args.rows, args.columns, args.variants, args.query, args.seed)
+    arrivals = schedule(requests, args.rate, args.speed, args.seed)
+
+    sampler = RSSSampler(args.pid, args.rss_interval) if args.pid is not None else None
+    if sampler is not None:
+        sampler.start()
+    records, elapsed = run_load(args.url, requests, args.concurrency, arrivals, args.timeout)
+    rss = sampler.stop() if sampler is not None else []
+
+    current = {
+        'format': RESULTS_FORMAT_VERSION,
+        'meta': {
+            'url': args.url,
+            'log': args.log,
+            'mix': None if args.log else args.mix,
+            'requests': len(requests),
+            'rows': args.rows,
+            'columns': args.columns,
+            'variants': args.variants,
+            'query': args.query,
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'speed': args.speed,
+            'seed': args.seed,
+            'elapsed': elapsed,
+            'python': platform.python_version(),
+            'timestamp': time.time(),
+        },
+        'results': summarize(records, elapsed),
+        'rss': rss,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    for name, result in current['results'].items():
+        print(
+            f"{name:32s} {result['requests']:6d} req {result['throughput']:8.2f}/s  errors {result['error_rate']:6.2%}  "
+            f"p50 {result['p50'] * 1000:8.1f} ms  p95 {result['p95'] * 1000:8.1f} ms  p99 {result['p99'] * 1000:8.1f} ms"
+        )
+    if rss:
+        print(f"server RSS peak {max(sample[1] for sample in rss) / 1e6:.1f} MB over {len(rss)} samples")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} measurements worse than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
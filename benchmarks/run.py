@@ -0,0 +1,164 @@
+import io
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tracemalloc
+import statistics
+import warnings
+import numpy as np
+import pandas as pd
+from benchmarks.generator import DEFAULT_MIX
+from benchmarks.generator import generate_csv
+from type_converter.models import Dataset
+from type_converter.services import clean_series
+from type_converter.services import detector_registry
+from type_converter.services import factorize_series
+from type_converter.services import infer_and_convert_data_types
+
+RESULTS_FORMAT_VERSION = 1
+
+# Timings below this many seconds in both runs are reported but never gated on, their
+# ratios are mostly timer and scheduler noise
+COMPARE_FLOOR_SECONDS = 0.001
+
+# Per-detector timings run for milliseconds and swing with the machine's load, so by
+# default they are only reported and the end-to-end timings decide
+DETECTOR_RESULT_PREFIX = 'detector:'
+
+def measure(function, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        runs.append(time.perf_counter() - start)
+
+    # Tracing slows allocations down, so peak memory gets a separate run of its own
+    tracemalloc.start()
+    function()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, {'seconds': statistics.median(runs), 'min_seconds': min(runs), 'runs': runs, 'peak_bytes': peak_bytes}
+
+def run_benchmarks(rows, columns, mix, null_ratio, cardinality, seed, repeat, backend, sampling=None):
+    buffer = io.StringIO()
+    expected = generate_csv(buffer, rows, columns, mix=mix, null_ratio=null_ratio, cardinality=cardinality, seed=seed)
+    csv_text = buffer.getvalue()
+
+    results = {}
+    dataframe, results['read_csv'] = measure(lambda: pd.read_csv(io.StringIO(csv_text)), repeat)
+
+    # Per-detector cost on exactly what the engine hands each detector: the distinct cleaned values
+    uniques_by_column = {}
+    for col in dataframe.columns:
+        _, uniques_by_column[col] = factorize_series(clean_series(dataframe[col]))
+    for detector in detector_registry.order():
+        for col, uniques in uniques_by_column.items():
+            _, results[f"detector:{detector.name}:{col}"] = measure(lambda: detector.detect(uniques), repeat)
+
+    dtypes, results['infer_and_convert_data_types'] = measure(
+        lambda: infer_and_convert_data_types(
+            Dataset(name='benchmark', dataframe=dataframe.copy(), type_hints=[]), backend=backend, sampling=sampling,
+        ),
+        repeat,
+    )
+
+    mismatches = {col: [expected[col], str(dtypes[col])] for col in expected if expected[col] != str(dtypes[col])}
+
+    return {
+        'format': RESULTS_FORMAT_VERSION,
+        'meta': {
+            'rows': rows,
+            'columns': columns,
+            'mix': mix,
+            'null_ratio': null_ratio,
+            'cardinality': cardinality,
+            'seed': seed,
+            'repeat': repeat,
+            'backend': backend,
+            'sampling': sampling,
+            'csv_bytes': len(csv_text),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'timestamp': time.time(),
+        },
+        'mismatches': mismatches,
+        'results': results,
+    }
+
+def best_seconds(result):
+    # The fastest repeat is the least disturbed by other work on the machine
+    return min(result['runs']) if result.get('runs') else result['seconds']
+
+def compare(current, baseline, threshold, floor=COMPARE_FLOOR_SECONDS, gate_detectors=False):
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        before, after = best_seconds(previous), best_seconds(result)
+        if before == 0:
+            continue
+        ratio = after / before
+        marker = ''
+        if max(before, after) < floor:
+            marker = '  (below floor)'
+        elif name.startswith(DETECTOR_RESULT_PREFIX) and not gate_detectors:
+            marker = '  (not gated)' if ratio > 1 + threshold else ''
+        elif ratio > 1 + threshold:
+            regressions.append(name)
+            marker = '  REGRESSION'
+        print(f"{name:60s} {before:10.4f}s -> {after:10.4f}s  x{ratio:5.2f}{marker}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark type inference on synthetic data.')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--columns', type=int, default=len(DEFAULT_MIX))
+    parser.add_argument('--mix', default=','.join(DEFAULT_MIX), help='Comma-separated column kinds, cycled across columns')
+    parser.add_argument('--null-ratio', type=float, default=0.0)
+    parser.add_argument('--cardinality', type=int, default=None, help='Distinct values per column, all unique when omitted')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--backend', default='auto')
+    parser.add_argument('--sample-size', type=int, default=None, help='Infer in sampling mode with this many rows per column')
+    parser.add_argument('--confidence', type=float, default=0.99)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    parser.add_argument('--baseline', help='Compare against a previous results file')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown against the baseline, 0.1 is 10%%')
+    parser.add_argument('--gate-detectors', action='store_true', help='Also fail on per-detector timings')
+    parser.add_argument('--floor', type=float, default=COMPARE_FLOOR_SECONDS, help='Timings under this many seconds are not compared')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+
+    sampling = {'sample_size': args.sample_size, 'confidence': args.confidence} if args.sample_size else None
+    current = run_benchmarks(
+        args.rows, args.columns, args.mix.split(','), args.null_ratio, args.cardinality, args.seed, args.repeat, args.backend, sampling,
+    )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    for name, result in current['results'].items():
+        print(f"{name:60s} {result['seconds']:10.4f}s  peak {result['peak_bytes'] / 1e6:10.1f} MB")
+    if current['mismatches']:
+        print(f"Unexpected dtypes: {current['mismatches']}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold, args.floor, args.gate_detectors)
+        if regressions:
+            print(f"{len(regressions)} benchmarks slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,4 +13,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "demo_server.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up, serves streamed CSV uploads before Django buffers them
+from type_converter.asgi import async_upload_application  # noqa: E402
+from type_converter.warmup import start_warm_up  # noqa: E402
+
+application = async_upload_application(django_application)
+
+start_warm_up()
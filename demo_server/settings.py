@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "type_converter.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -132,7 +133,78 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CSRF_TRUSTED_ORIGINS = ['http://localhost:5173']
 
+# How per-column type inference is executed: "serial", "thread", "process", or
+# "auto" to pick one from the size of each upload
+TYPE_CONVERTER_EXECUTION_BACKEND = "auto"
+
+# Uploads are written to a temporary file once, hashed and line-counted on the way.
+# Set TYPE_CONVERTER_MAX_UPLOAD_BYTES to reject larger bodies with 413 before they
+# are read in full. None, the default, accepts uploads of any size, as the streamed
+# path is built for multi-GB files
+FILE_UPLOAD_HANDLERS = ["type_converter.uploads.HashingUploadHandler"]
+TYPE_CONVERTER_MAX_UPLOAD_BYTES = None
+
+# Process-wide scheduler for the thread backend: "workers" threads shared by all
+# requests (null for one per CPU), and at most "max_queued" column tasks waiting.
+# Uploads arriving while the queue is full are rejected with 503 and Retry-After.
+TYPE_CONVERTER_SCHEDULER = {
+    "workers": None,
+    "max_queued": 4096,
+}
+
+# Inference results keyed on upload content and type mappings. Set "directory" to
+# also keep entries on disk across restarts
+TYPE_CONVERTER_CACHE = {
+    "max_entries": 1024,
+    "max_bytes": 64 * 1024 * 1024,
+    "ttl": 60 * 60,
+    "directory": None,
+}
+
+# Background inference jobs: uploads and job state are kept under "directory",
+# "workers" jobs run at once and at most "max_pending" may be queued or running.
+# Finished jobs are deleted after "max_age" seconds, None keeps them forever
+TYPE_CONVERTER_JOBS = {
+    "directory": BASE_DIR / "jobs",
+    "workers": 2,
+    "max_pending": 32,
+    "max_age": 24 * 60 * 60,
+}
+
+
+# Sampling mode, enabled per request with ?sample=1: detectors run on "sample_size"
+# rows from the head, tail and middle of each column, then only the winner is checked
+# against the whole column. A detector parsing less than "confidence" of the sample
+# sends the column back to a full scan. Both can be overridden per request.
+TYPE_CONVERTER_SAMPLING = {
+    "sample_size": 3000,
+    "confidence": 0.99,
+}
+
+# pandas, numpy and the detectors are imported on the first request that needs them.
+# "background" imports them in a thread as soon as the server starts, "blocking"
+# before it accepts requests, and None leaves them to the first request.
+TYPE_CONVERTER_WARM_UP = "background"
+
+# Schema previews infer from the first "rows" rows found within the first "max_bytes"
+# of an upload. Clients can lower or raise "rows" per request.
+TYPE_CONVERTER_PREVIEW = {
+    "rows": 500,
+    "max_bytes": 512 * 1024,
+}
+
+# Entries read as missing values while parsing, on top of pandas' own NA tokens such
+# as "NA" and "null". Clients can replace the list per request with ?na_values=a,b
+TYPE_CONVERTER_NA_VALUES = ["N/A", "Not Available", "unknown"]
+
+# CSV parser for uploads read in memory: "c", "pyarrow" for the multi-threaded Arrow
+# reader, or "auto" to use pyarrow whenever it is installed. Files pyarrow cannot type
+# from their first block fall back to the C parser
+TYPE_CONVERTER_CSV_ENGINE = "auto"
 
+# Relative standard error of the distinct-value sketch streamed uploads use for the
+# categorical decision. Columns too close to the threshold are recounted exactly.
+TYPE_CONVERTER_DISTINCT_ERROR = 0.01
 
 LOGGING = {
     'version': 1,
@@ -0,0 +1,29 @@
+"""
+Lean settings for instances that only serve the JSON API.
+
+Drops the admin, auth, sessions, messages and static files apps with their
+middleware and templates, none of which the type detector uses, and warms up
+the numeric stack in the background so new instances answer straight away.
+Select it with DJANGO_SETTINGS_MODULE=demo_server.settings_api.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    "corsheaders",
+    "type_converter",
+]
+
+MIDDLEWARE = [
+    "type_converter.middleware.MetricsMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+]
+
+TEMPLATES = []
+
+AUTH_PASSWORD_VALIDATORS = []
+
+TYPE_CONVERTER_WARM_UP = "background"
@@ -14,10 +14,17 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import include, path
+from type_converter.views import metrics
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    path("metrics", metrics, name="metrics"),
     path("type-detector/", include("type_converter.urls"))
 ]
+
+# The API-only settings leave the admin out
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path("admin/", admin.site.urls))
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "demo_server.settings")
 
 application = get_wsgi_application()
+
+# Loads the numeric stack ahead of the first inference, see TYPE_CONVERTER_WARM_UP
+from type_converter.warmup import start_warm_up  # noqa: E402
+
+start_warm_up()
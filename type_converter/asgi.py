@@ -0,0 +1,186 @@
+import io
+import json
+import time
+import asyncio
+import logging
+import tempfile
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.http import JsonResponse
+from .metrics import PARSE_SECONDS
+from .metrics import REQUEST_LATENCY
+from .metrics import UPLOAD_BYTES
+from .views import inference_response
+from .views import parse_disabled_detectors
+from .views import parse_na_values
+from .views import summarize_accumulators
+
+logger = logging.getLogger(__name__)
+
+# Raw CSV bodies posted here are parsed while they arrive. Django buffers the whole
+# body before calling a view, so this endpoint is served below Django by the ASGI app.
+ASYNC_UPLOAD_PATH = '/type-detector/inferences/async/'
+
+# Complete rows are parsed once this many bytes have arrived
+ASYNC_BLOCK_BYTES = 4 * 1024 * 1024
+
+# Upload bytes kept in memory for the distinct-value recount before spilling to disk
+ASYNC_SPOOL_BYTES = 8 * 1024 * 1024
+
+# Parsing and detectors run here, never on the event loop. None uses the executor default
+ASYNC_PARSE_WORKERS = None
+
+_parse_executor = ThreadPoolExecutor(max_workers=ASYNC_PARSE_WORKERS, thread_name_prefix='async-parse')
+
+class UploadTooLargeError(Exception):
+    pass
+
+# Fed an upload a block of bytes at a time, parses every complete row as soon as it
+# arrives and keeps only the column accumulators plus a spool for the recount pass
+class IncrementalCSVInference:
+    def __init__(self, type_hints=None, disabled_detectors=(), distinct_error=None, na_values=None):
+        self.type_hints = type_hints or []
+        self.disabled_detectors = disabled_detectors
+        self.distinct_error = distinct_error or settings.TYPE_CONVERTER_DISTINCT_ERROR
+        self.na_values = list(settings.TYPE_CONVERTER_NA_VALUES) if na_values is None else na_values
+
+        self.header = None
+        self.pending = b''
+        self.accumulators = {}
+        self.bytes_received = 0
+        self.parse_seconds = 0.0
+        self.spool = tempfile.SpooledTemporaryFile(max_size=ASYNC_SPOOL_BYTES)
+
+    def feed(self, data, final=False):
+        import pandas as pd
+        from .streaming import row_ends
+        from .streaming import update_accumulators
+
+        self.bytes_received += len(data)
+        self.spool.write(data)
+        self.pending += data
+
+        if self.header is None:
+            ends = row_ends(self.pending)
+            if len(ends) == 0 and not final:
+                return
+            end = ends[0] + 1 if len(ends) else len(self.pending)
+            self.header, self.pending = self.pending[:end], self.pending[end:]
+
+        ends = row_ends(self.pending)
+        end = len(self.pending) if final else (ends[-1] + 1 if len(ends) else 0)
+        block, self.pending = self.pending[:end], self.pending[end:]
+        # A header-only upload still reports its columns
+        if block.strip() or (final and not self.accumulators):
+            started = time.perf_counter()
+            chunk = pd.read_csv(io.BytesIO(self.header + block), na_values=self.na_values)
+            self.parse_seconds += time.perf_counter() - started
+            update_accumulators(self.accumulators, chunk, self.type_hints, self.disabled_detectors, self.distinct_error, erroneous_entries=())
+
+    def finish(self, optimize_memory=False):
+        PARSE_SECONDS.observe(self.parse_seconds, format='csv')
+        self.spool.seek(0)
+        return summarize_accumulators(self.accumulators, self.spool, optimize_memory, self.na_values)
+
+    def close(self):
+        self.spool.close()
+
+async def read_upload_stream(receive, inference, max_bytes=None):
+    loop = asyncio.get_running_loop()
+    parsing = None
+    buffered = []
+    size = 0
+    total = 0
+
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            if parsing is not None:
+                await parsing
+            return False
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        buffered.append(body)
+        size += len(body)
+        total += len(body)
+        if max_bytes is not None and total > max_bytes:
+            if parsing is not None:
+                await parsing
+            raise UploadTooLargeError(f'Uploads are limited to {max_bytes} bytes.')
+
+        if size >= ASYNC_BLOCK_BYTES or not more_body:
+            # The next block is received while the previous one is still being parsed
+            if parsing is not None:
+                await parsing
+            parsing = loop.run_in_executor(_parse_executor, inference.feed, b''.join(buffered), not more_body)
+            buffered = []
+            size = 0
+
+        if not more_body:
+            await parsing
+            return True
+
+async def infer_upload_stream(scope, receive):
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    file_name = query.get('name', ['upload.csv'])[0]
+    if not file_name.endswith('.csv'):
+        return JsonResponse({'error': 'Only CSV uploads can be streamed.'}, status=400)
+
+    try:
+        mappings = [item for item in json.loads(query.get('mappings', ['[]'])[0]) if item[1] is not None]
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+
+    disabled, error_response = parse_disabled_detectors(query.get('disable', [None])[0])
+    if error_response is not None:
+        return error_response
+    optimize_memory = query.get('optimize', ['0'])[0].lower() in ('1', 'true', 'yes')
+    na_values = parse_na_values(query.get('na_values', [None])[0])
+
+    # Bodies announcing their length are refused before any of it is read
+    max_bytes = settings.TYPE_CONVERTER_MAX_UPLOAD_BYTES
+    content_length = dict(scope.get('headers', [])).get(b'content-length')
+    if max_bytes is not None and content_length is not None and int(content_length) > max_bytes:
+        return JsonResponse({'error': f'File too large. Uploads are limited to {max_bytes} bytes.'}, status=413)
+
+    logger.info('Receiving streamed upload: %s', file_name)
+    inference = IncrementalCSVInference(mappings, disabled, na_values=na_values)
+    try:
+        if not await read_upload_stream(receive, inference, max_bytes):
+            logger.info('Client disconnected during upload of %s', file_name)
+            return None
+        result = await asyncio.get_running_loop().run_in_executor(_parse_executor, inference.finish, optimize_memory)
+    except UploadTooLargeError as e:
+        return JsonResponse({'error': f'File too large. {str(e)}'}, status=413)
+    except Exception as e:
+        logger.exception('An error occurred while processing the file: %s', str(e))
+        return JsonResponse({'error': f'Invalid file content. Could not process file: {str(e)}'}, status=400)
+    finally:
+        inference.close()
+
+    UPLOAD_BYTES.observe(inference.bytes_received)
+    return inference_response(file_name, result)
+
+async def send_response(send, response):
+    headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in response.items()]
+    await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': response.content})
+
+def async_upload_application(django_application):
+    async def application(scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != ASYNC_UPLOAD_PATH:
+            return await django_application(scope, receive, send)
+
+        started = time.perf_counter()
+        if scope['method'] != 'POST':
+            response = JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+        else:
+            response = await infer_upload_stream(scope, receive)
+        if response is None:
+            return
+        REQUEST_LATENCY.observe(time.perf_counter() - started, view='infer_upload_stream', method=scope['method'], status=response.status_code)
+        await send_response(send, response)
+
+    return application
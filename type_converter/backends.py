@@ -0,0 +1,191 @@
+import os
+import logging
+import threading
+import multiprocessing
+import pandas as pd
+import numpy as np
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from .scheduler import inference_scheduler
+
+logger = logging.getLogger(__name__)
+
+BACKEND_AUTO = 'auto'
+BACKEND_SERIAL = 'serial'
+BACKEND_THREAD = 'thread'
+BACKEND_PROCESS = 'process'
+
+EXECUTION_BACKENDS = {BACKEND_AUTO, BACKEND_SERIAL, BACKEND_THREAD, BACKEND_PROCESS}
+
+# Below this many cells pool start-up and column transfer cost more than they save
+THREAD_BACKEND_MIN_CELLS = 50000
+PROCESS_BACKEND_MIN_CELLS = 2000000
+
+# Worker count for the process backend, None uses the number of CPUs
+PROCESS_POOL_WORKERS = None
+
+# Wide tables send columns to the pools in batches of at least this many cells,
+# while keeping a few batches per worker so the last ones do not run alone
+BATCH_MIN_CELLS = 200000
+BATCHES_PER_WORKER = 4
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def choose_backend(row_count, column_count):
+    cells = row_count * column_count
+    if column_count < 2 or cells < THREAD_BACKEND_MIN_CELLS:
+        return BACKEND_SERIAL
+    if cells >= PROCESS_BACKEND_MIN_CELLS and (os.cpu_count() or 1) > 1:
+        return BACKEND_PROCESS
+    return BACKEND_THREAD
+
+def column_batch_size(row_count, column_count, workers=None):
+    workers = workers or os.cpu_count() or 1
+    by_cells = -(-BATCH_MIN_CELLS // max(row_count, 1))
+    by_balance = -(-column_count // (workers * BATCHES_PER_WORKER))
+    return max(1, min(by_cells, by_balance))
+
+def batched(columns, batch_size):
+    return [columns[start:start + batch_size] for start in range(0, len(columns), batch_size)]
+
+def get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned workers only import pandas and the detectors, never Django
+            _process_pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _process_pool
+
+def run_in_process_pool(function, *args):
+    # Process work still goes through the scheduler, whose worker waits on the pool, so
+    # the heaviest requests queue, interleave and get turned away like every other
+    return get_process_pool().submit(function, *args).result()
+
+def _create_block(array, blocks):
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocks.append(block)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block.name
+
+def _read_block(name, dtype, length):
+    # Workers share the parent's resource tracker, so the parent alone unlinks the block
+    block = SharedMemory(name=name)
+    try:
+        return np.ndarray((length,), dtype=dtype, buffer=block.buf).copy()
+    finally:
+        block.close()
+
+def share_series(series, blocks):
+    values = series.to_numpy()
+    length = len(values)
+
+    if values.dtype != object and values.dtype.kind in 'biufcmM':
+        return {'kind': 'array', 'block': _create_block(values, blocks), 'dtype': values.dtype.str, 'length': length}
+
+    if pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty'):
+        # Strings travel as one UTF-8 buffer plus character offsets, decoded in the worker
+        missing = series.isna().to_numpy()
+        strings = series.where(~missing, '')
+        text = ''.join(strings).encode('utf-8', 'surrogatepass')
+        offsets = np.zeros(length + 1, dtype=np.int64)
+        np.cumsum(strings.str.len().to_numpy(), out=offsets[1:])
+        return {
+            'kind': 'strings',
+            'block': _create_block(np.frombuffer(text, dtype=np.uint8), blocks),
+            'nbytes': len(text),
+            'offsets': _create_block(offsets, blocks),
+            'missing': np.packbits(missing),
+            'length': length,
+        }
+
+    # Mixed or extension values have no flat buffer layout, pickle them as before
+    return {'kind': 'pickle', 'values': values}
+
+def attach_series(descriptor):
+    kind = descriptor['kind']
+    length = descriptor['length'] if kind != 'pickle' else None
+
+    if kind == 'array':
+        return pd.Series(_read_block(descriptor['block'], np.dtype(descriptor['dtype']), length))
+
+    if kind == 'strings':
+        text = _read_block(descriptor['block'], np.uint8, descriptor['nbytes']).tobytes().decode('utf-8', 'surrogatepass')
+        offsets = _read_block(descriptor['offsets'], np.int64, length + 1)
+        missing = np.unpackbits(descriptor['missing'], count=length).astype(bool)
+        values = np.empty(length, dtype=object)
+        values[:] = [text[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+        values[missing] = np.nan
+        return pd.Series(values)
+
+    return pd.Series(descriptor['values'])
+
+def _infer_shared(infer, descriptors):
+    # One frame per batch, built from the shared buffers without copying them again
+    batch = pd.DataFrame({col: attach_series(descriptor) for col, descriptor in descriptors})
+    results = []
+    for col, _ in descriptors:
+        _, converted, *extra = infer(batch, col)
+
+        # Text results are just the original column with rejected entries blanked out,
+        # so only send back which rows survived instead of the strings themselves
+        if converted.dtype == object:
+            results.append((col, None, np.packbits(converted.notna().to_numpy()), extra))
+        else:
+            results.append((col, converted.array, None, extra))
+    return results
+
+def _infer_batch(infer, df, columns):
+    return [infer(df, col) for col in columns]
+
+def run_serial(infer, df, columns, batch_size=1):
+    for col in columns:
+        yield infer(df, col)
+
+def run_threads(infer, df, columns, batch_size=1):
+    futures = inference_scheduler.submit(partial(_infer_batch, infer, df, batch) for batch in batched(columns, batch_size))
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        # Columns not started yet are dropped when the caller gives up early
+        for future in futures:
+            future.cancel()
+
+def run_processes(infer, df, columns, batch_size=1):
+    blocks = []
+    futures = []
+    try:
+        futures = inference_scheduler.submit([
+            partial(run_in_process_pool, _infer_shared, infer, [(col, share_series(df[col], blocks)) for col in batch])
+            for batch in batched(columns, batch_size)
+        ])
+        for future in futures:
+            for col, values, kept, extra in future.result():
+                if values is None:
+                    kept = np.unpackbits(kept, count=len(df)).astype(bool)
+                    yield (col, df[col].where(kept), *extra)
+                else:
+                    yield (col, pd.Series(values, index=df.index), *extra)
+    finally:
+        for future in futures:
+            future.cancel()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+def run_inference(infer, df, columns, backend=BACKEND_AUTO, batch_size=1):
+    if backend not in EXECUTION_BACKENDS:
+        raise ValueError(f"Unknown execution backend: {backend}")
+
+    if backend == BACKEND_AUTO:
+        backend = choose_backend(len(df), len(columns))
+    logger.debug("Running inference for %d columns on the '%s' backend", len(columns), backend)
+
+    if backend == BACKEND_PROCESS:
+        return run_processes(infer, df, columns, batch_size)
+    elif backend == BACKEND_THREAD:
+        return run_threads(infer, df, columns, batch_size)
+    else:
+        return run_serial(infer, df, columns, batch_size)
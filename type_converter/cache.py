@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever inference output changes so stale on-disk entries stop matching
+CACHE_VERSION = 9
+
+def normalize_type_hints(type_hints):
+    return sorted([str(col), str(dtype)] for col, dtype in type_hints)
+
+def content_hash(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_key(chunks, file_name, type_hints, options=None):
+    return cache_key_for_hash(content_hash(chunks), file_name, type_hints, options)
+
+def cache_key_for_hash(upload_hash, file_name, type_hints, options=None):
+    extension = os.path.splitext(file_name)[1].lower()
+    hints = json.dumps(normalize_type_hints(type_hints), separators=(',', ':'))
+    options = json.dumps(options, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{CACHE_VERSION}:{extension}:{upload_hash}:{hints}:{options}".encode()).hexdigest()
+
+class InferenceCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=3600, directory=None, max_disk_entries=10000, clock=time.time):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, payload = entry
+                if expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(payload)
+                self._remove(key)
+
+        payload = self._read_disk(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, payload)
+        return json.loads(payload)
+
+    def set(self, key, value):
+        payload = json.dumps(value)
+        with self._lock:
+            self._store(key, payload)
+        self._write_disk(key, payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def _store(self, key, payload):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self.clock() + self.ttl, size, payload)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_disk(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= self.clock():
+                os.remove(path)
+                return None
+            with open(path, 'r') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, payload):
+        if self.directory is None:
+            return
+        try:
+            # Write then rename so a crash never leaves a truncated entry behind
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(temp_path, self._path(key))
+            os.utime(self._path(key), (self.clock(), self.clock()))
+            self._prune_disk()
+        except OSError:
+            logger.exception("Could not write inference cache entry %s", key)
+
+    def _prune_disk(self):
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.json')]
+        if len(paths) <= self.max_disk_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
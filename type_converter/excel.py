@@ -0,0 +1,191 @@
+import os
+import logging
+from functools import partial
+from concurrent.futures import as_completed
+
+logger = logging.getLogger(__name__)
+
+# pandas and the detectors are imported where they are used, so the views can
+# import this module without paying for them at startup
+
+# Rows turned into a DataFrame at a time, memory stays proportional to one batch
+EXCEL_BATCH_ROWS = 10000
+
+class ExcelUnavailableError(Exception):
+    pass
+
+class WorkbookSelectionError(ValueError):
+    pass
+
+def load_openpyxl():
+    # openpyxl is optional, only .xlsx uploads need it
+    try:
+        import openpyxl
+    except ImportError as e:
+        raise ExcelUnavailableError('Reading .xlsx files requires the openpyxl package') from e
+    return openpyxl
+
+def is_xls(file_name):
+    return os.path.splitext(file_name)[1].lower() == '.xls'
+
+class _Workbook:
+    # Read-only view over one workbook, rows come out lazily as tuples of Python values.
+    # Uploads are spooled under a neutral suffix, so the format comes from the upload's name
+    def __init__(self, path, xls=False):
+        self._file = None
+        if xls:
+            import xlrd
+            self._xlrd = xlrd
+            self._book = xlrd.open_workbook(path, on_demand=True)
+        else:
+            openpyxl = load_openpyxl()
+            self._xlrd = None
+            self._file = open(path, 'rb')
+            try:
+                self._book = openpyxl.load_workbook(self._file, read_only=True, data_only=True)
+            except Exception:
+                self._file.close()
+                raise
+
+    def sheet_names(self):
+        return self._book.sheet_names() if self._xlrd is not None else self._book.sheetnames
+
+    def rows(self, sheet):
+        if self._xlrd is None:
+            yield from self._book[sheet].iter_rows(values_only=True)
+            return
+
+        xlrd = self._xlrd
+        worksheet = self._book.sheet_by_name(sheet)
+        for index in range(worksheet.nrows):
+            yield tuple(self._xls_value(xlrd, cell) for cell in worksheet.row(index))
+        self._book.unload_sheet(sheet)
+
+    def _xls_value(self, xlrd, cell):
+        if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+            return None
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            return xlrd.xldate_as_datetime(cell.value, self._book.datemode)
+        if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(cell.value)
+        # Excel stores every number as a float, whole ones read back as integers like pandas does
+        if cell.ctype == xlrd.XL_CELL_NUMBER and float(cell.value).is_integer():
+            return int(cell.value)
+        return cell.value
+
+    def close(self):
+        if self._xlrd is not None:
+            self._book.release_resources()
+        else:
+            self._book.close()
+            self._file.close()
+
+def sheet_names(path, xls=False):
+    workbook = _Workbook(path, xls)
+    try:
+        return workbook.sheet_names()
+    finally:
+        workbook.close()
+
+def sheet_column_counts(path, sheets, columns=None, xls=False):
+    # Only the header rows are read, a sheet without one has no columns
+    workbook = _Workbook(path, xls)
+    try:
+        headers = {sheet: next(workbook.rows(sheet), None) for sheet in sheets}
+    finally:
+        workbook.close()
+    return {sheet: 0 if header is None else len(header if columns is None else columns) for sheet, header in headers.items()}
+
+def read_sheet_chunks(path, sheet, columns=None, xls=False, batch_rows=EXCEL_BATCH_ROWS):
+    import pandas as pd
+    workbook = _Workbook(path, xls)
+    try:
+        rows = workbook.rows(sheet)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = [str(name) if name is not None else f'Unnamed: {position}' for position, name in enumerate(header)]
+
+        positions = list(range(len(names)))
+        if columns is not None:
+            missing = [name for name in columns if name not in names]
+            if missing:
+                raise WorkbookSelectionError(f"Sheet '{sheet}' has no columns named: {', '.join(missing)}")
+            positions = [names.index(name) for name in columns]
+
+        batch = []
+        emitted = False
+        for row in rows:
+            # Trailing cells may be missing from short rows
+            batch.append([row[position] if position < len(row) else None for position in positions])
+            if len(batch) >= batch_rows:
+                yield pd.DataFrame(batch, columns=[names[position] for position in positions])
+                batch = []
+                emitted = True
+        if batch or not emitted:
+            yield pd.DataFrame(batch, columns=[names[position] for position in positions])
+    finally:
+        workbook.close()
+
+def infer_sheet(
+    path, sheet, xls=False, columns=None, type_hints=None, disabled_detectors=(), distinct_error=None, optimize_memory=False, erroneous_entries=None,
+):
+    from .services import KNOWN_ERRONEOUS_ENTRIES
+    from .sketch import DISTINCT_ERROR
+    from .streaming import infer_streaming_dtypes
+    from .streaming import streaming_result
+
+    # Cells come out of the workbook as they are, so the erroneous entries are dropped during inference
+    chunks = read_sheet_chunks(path, sheet, columns, xls)
+    accumulators = infer_streaming_dtypes(
+        chunks, type_hints, disabled_detectors, distinct_error or DISTINCT_ERROR,
+        KNOWN_ERRONEOUS_ENTRIES if erroneous_entries is None else set(erroneous_entries),
+    )
+
+    def read_columns(positions):
+        return read_sheet_chunks(path, sheet, [list(accumulators)[position] for position in positions], xls)
+    return sheet, streaming_result(accumulators, read_columns, optimize_memory)
+
+def infer_workbook(
+    path, xls=False, sheets=None, columns=None, type_hints=None, disabled_detectors=(), distinct_error=None, optimize_memory=False,
+    erroneous_entries=None, on_sheet=None,
+):
+    # on_sheet(sheet, result) is called as each sheet finishes, in the order they finish
+    available = sheet_names(path, xls)
+    sheets = available if sheets is None else sheets
+    unknown = [sheet for sheet in sheets if sheet not in available]
+    if unknown:
+        raise WorkbookSelectionError(f"Workbook has no sheets named: {', '.join(unknown)}")
+
+    arguments = (xls, columns, type_hints, disabled_detectors, distinct_error, optimize_memory, erroneous_entries)
+    logger.info('Inferring %d sheets of %s', len(sheets), path)
+    # Every sheet is read by its own worker process, each opening the workbook itself.
+    # Sheets queue on the inference scheduler, which raises SchedulerFullError when it is full
+    if len(sheets) > 1 and (os.cpu_count() or 1) > 1:
+        from .backends import run_in_process_pool
+        from .scheduler import inference_scheduler
+        futures = inference_scheduler.submit([partial(run_in_process_pool, infer_sheet, path, sheet, *arguments) for sheet in sheets])
+        if on_sheet is not None:
+            for future in as_completed(futures):
+                on_sheet(*future.result())
+        return dict(future.result() for future in futures)
+
+    results = {}
+    for sheet in sheets:
+        results[sheet] = infer_sheet(path, sheet, *arguments)[1]
+        if on_sheet is not None:
+            on_sheet(sheet, results[sheet])
+    return results
+
+def read_sheet_head(path, sheet=None, xls=False, rows=EXCEL_BATCH_ROWS):
+    available = sheet_names(path, xls)
+    sheet = available[0] if sheet is None else sheet
+    if sheet not in available:
+        raise WorkbookSelectionError(f"Workbook has no sheet named: {sheet}")
+    # One row past the limit tells whether the sheet was read in full
+    chunks = read_sheet_chunks(path, sheet, xls=xls, batch_rows=rows + 1)
+    try:
+        df = next(chunks)
+    finally:
+        chunks.close()
+    return sheet, df.iloc[:rows], len(df) <= rows
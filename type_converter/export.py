@@ -0,0 +1,102 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_ARROW = 'arrow'
+EXPORT_PARQUET = 'parquet'
+
+EXPORT_CONTENT_TYPES = {
+    EXPORT_ARROW: 'application/vnd.apache.arrow.stream',
+    EXPORT_PARQUET: 'application/vnd.apache.parquet',
+}
+
+# Rows per record batch, and per Parquet row group
+EXPORT_BATCH_ROWS = 65536
+
+# Schema metadata key holding the pandas dtype of every column, complex values
+# have no Arrow type and travel as a struct of real and imaginary parts
+DTYPES_METADATA_KEY = b'type_converter.dtypes'
+
+class ExportUnavailableError(Exception):
+    pass
+
+def load_pyarrow():
+    # pyarrow is optional, only uploads asking for a binary export need it
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ExportUnavailableError('Columnar export requires the pyarrow package') from e
+    return pyarrow
+
+class _ChunkSink:
+    # Collects whatever the writer produced so far, drained after every batch
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def arrow_type(pa, series):
+    if series.dtype.kind == 'c':
+        return pa.struct([('real', pa.float64()), ('imag', pa.float64())])
+    if series.dtype == object:
+        return pa.string()
+    return pa.array(series.iloc[:0], from_pandas=True).type
+
+def arrow_array(pa, series, arrow_type):
+    if series.dtype.kind == 'c':
+        values = series.to_numpy()
+        return pa.StructArray.from_arrays(
+            [pa.array(values.real), pa.array(values.imag)], names=['real', 'imag'], mask=pa.array(series.isna().to_numpy()),
+        )
+    if series.dtype == object:
+        # Text columns may still hold numbers next to strings, Arrow needs one type per column
+        series = series.map(str, na_action='ignore')
+    return pa.array(series, type=arrow_type, from_pandas=True)
+
+def iter_record_batches(pa, df, schema):
+    for start in range(0, max(len(df), 1), EXPORT_BATCH_ROWS):
+        batch = df.iloc[start:start + EXPORT_BATCH_ROWS]
+        arrays = [arrow_array(pa, batch.iloc[:, position], field.type) for position, field in enumerate(schema)]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def export_schema(pa, df):
+    fields = [pa.field(str(col), arrow_type(pa, df.iloc[:, position])) for position, col in enumerate(df.columns)]
+    dtypes = {str(col): str(dtype) for col, dtype in df.dtypes.items()}
+    return pa.schema(fields, metadata={DTYPES_METADATA_KEY: json.dumps(dtypes)})
+
+def stream_dataframe(df, export_format):
+    pa = load_pyarrow()
+    schema = export_schema(pa, df)
+    sink = _ChunkSink()
+
+    if export_format == EXPORT_PARQUET:
+        writer = pa.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    def generate():
+        for batch in iter_record_batches(pa, df, schema):
+            if export_format == EXPORT_PARQUET:
+                writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+    logger.info("Streaming %d rows as %s", len(df), export_format)
+    return generate()
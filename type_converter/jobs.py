@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Minimum seconds between progress writes, the final column is always written
+PROGRESS_INTERVAL = 0.5
+
+# Finished jobs and their results are deleted this many seconds after they finished
+JOB_MAX_AGE = 24 * 60 * 60
+
+# Minimum seconds between sweeps for expired jobs
+PURGE_INTERVAL = 60
+
+JOB_INTERRUPTED_ERROR = 'Interrupted by a server restart'
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class QueueFullError(Exception):
+    pass
+
+class JobStore:
+    def __init__(self, directory, max_age=JOB_MAX_AGE):
+        self.directory = str(directory)
+        self.path = os.path.join(self.directory, 'jobs.sqlite3')
+        self.max_age = max_age
+        # Jobs are tagged with the process running them, so a restarted one can tell
+        # its predecessor's abandoned jobs from those of its live siblings
+        self.host = socket.gethostname()
+        self._initialized = False
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        with self._lock:
+            if not self._initialized:
+                os.makedirs(self.directory, exist_ok=True)
+                with sqlite3.connect(self.path) as connection:
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS jobs ("
+                        "id TEXT PRIMARY KEY, status TEXT NOT NULL, file_name TEXT NOT NULL, "
+                        "options TEXT NOT NULL, progress TEXT, result TEXT, error TEXT, "
+                        "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+                    )
+                    columns = [row[1] for row in connection.execute("PRAGMA table_info(jobs)")]
+                    if 'host' not in columns:
+                        connection.execute("ALTER TABLE jobs ADD COLUMN host TEXT")
+                        connection.execute("ALTER TABLE jobs ADD COLUMN pid INTEGER")
+                    self._fail_interrupted(connection)
+                self._initialized = True
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _fail_interrupted(self, connection):
+        # Queued and running jobs whose process is gone would otherwise never finish
+        rows = connection.execute(
+            "SELECT id, file_name, host, pid FROM jobs WHERE status IN (?, ?)", (JOB_QUEUED, JOB_RUNNING),
+        ).fetchall()
+        interrupted = [
+            (job_id, file_name) for job_id, file_name, host, pid in rows
+            if host is None or (host == self.host and pid != os.getpid() and not process_alive(pid))
+        ]
+        for job_id, file_name in interrupted:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?", (JOB_FAILED, JOB_INTERRUPTED_ERROR, time.time(), job_id),
+            )
+            try:
+                os.remove(self.upload_path(job_id, file_name))
+            except OSError:
+                pass
+        if interrupted:
+            logger.warning("Marked %d interrupted inference jobs as failed", len(interrupted))
+
+    def purge(self, now=None):
+        # Deletes finished jobs older than max_age, their uploads are already gone
+        now = time.time() if now is None else now
+        with closing(self._connect()) as connection, connection:
+            deleted = connection.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (JOB_DONE, JOB_FAILED, now - self.max_age),
+            ).rowcount
+        self._last_purge = now
+        if deleted:
+            logger.info("Deleted %d expired inference jobs", deleted)
+        return deleted
+
+    def purge_if_due(self):
+        if self.max_age is not None and time.time() - self._last_purge >= PURGE_INTERVAL:
+            self.purge()
+
+    def upload_path(self, job_id, file_name):
+        return os.path.join(self.directory, job_id + os.path.splitext(file_name)[1].lower())
+
+    def create(self, file_name, chunks, options):
+        job_id = uuid.uuid4().hex
+
+        with closing(self._connect()) as connection, connection:
+            with open(self.upload_path(job_id, file_name), 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+
+            now = time.time()
+            connection.execute(
+                "INSERT INTO jobs (id, status, file_name, options, created_at, updated_at, host, pid) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, file_name, json.dumps(options), now, now, self.host, os.getpid()),
+            )
+        return job_id
+
+    def update(self, job_id, **fields):
+        for name in ('progress', 'result'):
+            if name in fields:
+                fields[name] = json.dumps(fields[name])
+        fields['updated_at'] = time.time()
+
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT id, status, file_name, options, progress, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            'job_id': row[0],
+            'status': row[1],
+            'file_name': row[2],
+            'options': json.loads(row[3]),
+            'progress': json.loads(row[4]) if row[4] else None,
+            'result': json.loads(row[5]) if row[5] else None,
+            'error': row[6],
+            'created_at': row[7],
+            'updated_at': row[8],
+        }
+
+class JobQueue:
+    def __init__(self, store, run, workers=2, max_pending=32):
+        self.store = store
+        self.run = run
+        self.workers = workers
+        self.max_pending = max_pending
+
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, file_name, chunks, options):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"{self._pending} inference jobs are already waiting")
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='inference-job')
+
+        try:
+            self.store.purge_if_due()
+            job_id = self.store.create(file_name, chunks, options)
+            self._executor.submit(self._execute, job_id, file_name, options)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        logger.info("Queued inference job %s for file %s", job_id, file_name)
+        return job_id
+
+    def _execute(self, job_id, file_name, options):
+        path = self.store.upload_path(job_id, file_name)
+        progress = {'columns_done': 0, 'columns_total': None, 'columns': {}}
+        last_write = [0.0]
+
+        def on_column(col, dtype, done, total):
+            progress['columns'][str(col)] = dtype
+            progress['columns_done'] = done
+            progress['columns_total'] = total
+            now = time.monotonic()
+            if done == total or now - last_write[0] >= PROGRESS_INTERVAL:
+                last_write[0] = now
+                self.store.update(job_id, progress=progress)
+
+        try:
+            self.store.update(job_id, status=JOB_RUNNING)
+            result = self.run(path, file_name, options, on_column)
+            # Cached results finish without reporting any column along the way
+            if progress['columns_total'] is None:
+                progress.update(columns_done=len(result['types']), columns_total=len(result['types']), columns=result['types'])
+            self.store.update(job_id, status=JOB_DONE, result=result, progress=progress)
+            logger.info("Inference job %s finished", job_id)
+        except Exception as e:
+            logger.exception("Inference job %s failed: %s", job_id, str(e))
+            self.store.update(job_id, status=JOB_FAILED, error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import subprocess
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+# Runs in a fresh interpreter so nothing is imported yet, and prints its phase timings
+# as the last line of stdout. python -X importtime writes one line per module to stderr
+STARTUP_SCRIPT = '''
+import json
+import time
+timings = {}
+started = time.perf_counter()
+import django
+django.setup()
+timings['setup'] = time.perf_counter() - started
+
+mark = time.perf_counter()
+from django.core.handlers.wsgi import WSGIHandler
+handler = WSGIHandler()
+timings['handler'] = time.perf_counter() - mark
+
+if WARM_UP:
+    mark = time.perf_counter()
+    from type_converter.warmup import warm_up
+    warm_up()
+    timings['warm_up'] = time.perf_counter() - mark
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+client = Client(HTTP_HOST='localhost')
+for name, send in (
+    ('first_types_response', lambda: client.get('/type-detector/types/')),
+    ('first_inference_response', lambda: client.post('/type-detector/inferences/', {'file': SimpleUploadedFile('startup.csv', b'a,b\\n1,x\\n2,y\\n')})),
+):
+    mark = time.perf_counter()
+    status = send().status_code
+    timings[name] = time.perf_counter() - mark
+    if status != 200:
+        raise SystemExit(f'{name} returned {status}')
+timings['total'] = time.perf_counter() - started
+print(json.dumps(timings))
+'''
+
+def parse_importtime(stderr):
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({'module': name.strip(), 'self': int(self_us) / 1e6, 'cumulative': int(cumulative_us) / 1e6})
+    return modules
+
+def package_totals(modules):
+    totals = {}
+    for module in modules:
+        package = module['module'].split('.')[0]
+        totals[package] = totals.get(package, 0.0) + module['self']
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+class Command(BaseCommand):
+    help = 'Measures cold start: import cost per module and package, and time to the first responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Slowest modules and packages to list')
+        parser.add_argument('--warm-up', action='store_true', help='Run the warm-up hook before the first requests')
+        parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        script = STARTUP_SCRIPT.replace('WARM_UP', repr(options['warm_up']), 1)
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script], env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'Startup run failed')
+
+        modules = parse_importtime(completed.stderr)
+        report = {
+            'settings': settings.SETTINGS_MODULE,
+            'timings': json.loads(completed.stdout.strip().splitlines()[-1]),
+            'packages': package_totals(modules),
+            'modules': sorted(modules, key=lambda module: module['cumulative'], reverse=True),
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"Settings: {report['settings']}")
+        for name, seconds in report['timings'].items():
+            self.stdout.write(f"{name:30s} {seconds * 1000:10.1f} ms")
+        self.stdout.write('\nImport time by package (self):')
+        for package, seconds in list(report['packages'].items())[:options['top']]:
+            self.stdout.write(f"{package:30s} {seconds * 1000:10.1f} ms")
+        self.stdout.write('\nSlowest modules (cumulative):')
+        for module in report['modules'][:options['top']]:
+            self.stdout.write(f"{module['module']:50s} {module['cumulative'] * 1000:10.1f} ms")
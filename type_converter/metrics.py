@@ -0,0 +1,85 @@
+import bisect
+import threading
+
+# Metrics are kept per server process, each worker process exposes its own
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DETECTOR_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+SIZE_BUCKETS = tuple(1024 * 4 ** power for power in range(11))
+
+_registry = []
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labelnames=(), registry=_registry):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in sorted(self._series.items())]
+
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return '\n'.join(lines)
+
+def render_gauges(prefix, documentation, values):
+    lines = []
+    for name, value in values.items():
+        lines.append(f"# HELP {prefix}_{name} {documentation}")
+        lines.append(f"# TYPE {prefix}_{name} gauge")
+        lines.append(f"{prefix}_{name} {_format_value(value)}")
+    return '\n'.join(lines)
+
+def render_metrics():
+    return '\n'.join(metric.render() for metric in _registry)
+
+REQUEST_LATENCY = Histogram(
+    'type_converter_request_seconds', 'Time spent serving a request.', LATENCY_BUCKETS, labelnames=('view', 'method', 'status'),
+)
+PARSE_SECONDS = Histogram(
+    'type_converter_parse_seconds', 'Time spent parsing an upload into a DataFrame.', LATENCY_BUCKETS, labelnames=('format',),
+)
+INFERENCE_SECONDS = Histogram(
+    'type_converter_inference_seconds', 'Time spent inferring and converting all columns of an upload.', LATENCY_BUCKETS,
+)
+DETECTOR_SECONDS = Histogram(
+    'type_converter_detector_seconds', 'Time spent in one detector attempt on one column.', DETECTOR_BUCKETS, labelnames=('detector', 'outcome'),
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    'type_converter_scheduler_wait_seconds', 'Time a column task waited for a scheduler worker.', LATENCY_BUCKETS,
+)
+UPLOAD_BYTES = Histogram(
+    'type_converter_upload_bytes', 'Size of uploaded files.', SIZE_BUCKETS,
+)
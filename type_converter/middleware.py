@@ -0,0 +1,15 @@
+import time
+from .metrics import REQUEST_LATENCY
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+
+        match = request.resolver_match
+        view = match.url_name if match is not None and match.url_name else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, view=view, method=request.method, status=response.status_code)
+        return response
@@ -3,6 +3,8 @@ class Dataset:
         self.name = name
         self.dataframe = dataframe
         self.type_hints = type_hints if type_hints is not None else []
+        self.datetime_formats = {}
+        self.memory_usage = {}
 
     def size(self):
         return self.dataframe.shape
@@ -0,0 +1,76 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+CSV_ENGINE_AUTO = 'auto'
+CSV_ENGINE_C = 'c'
+CSV_ENGINE_PYARROW = 'pyarrow'
+
+CSV_ENGINES = (CSV_ENGINE_AUTO, CSV_ENGINE_C, CSV_ENGINE_PYARROW)
+
+# Spellings the C parser reads as booleans, pyarrow would also take 1 and 0
+CSV_TRUE_VALUES = ['True', 'TRUE', 'true']
+CSV_FALSE_VALUES = ['False', 'FALSE', 'false']
+
+def load_pyarrow_csv():
+    # pyarrow is optional, without it every upload goes through the C parser
+    try:
+        import pyarrow.csv
+    except ImportError:
+        return None
+    return pyarrow.csv
+
+def read_csv(source, na_values=(), engine=CSV_ENGINE_AUTO, memory_map=False):
+    # na_values are read as missing on top of pandas' own NA tokens
+    import pandas as pd
+
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine: {engine}")
+    pyarrow_csv = load_pyarrow_csv() if engine != CSV_ENGINE_C else None
+    if engine == CSV_ENGINE_PYARROW and pyarrow_csv is None:
+        raise ValueError('The pyarrow CSV engine requires the pyarrow package')
+
+    if pyarrow_csv is not None:
+        df = _read_csv_pyarrow(pyarrow_csv, source, na_values)
+        if df is not None:
+            return df
+        if hasattr(source, 'seek'):
+            source.seek(0)
+    return pd.read_csv(source, na_values=list(na_values), memory_map=memory_map)
+
+def _read_csv_pyarrow(pyarrow_csv, source, na_values):
+    import pyarrow as pa
+    import pandas as pd
+
+    convert_options = pyarrow_csv.ConvertOptions(
+        null_values=sorted(set(pyarrow_csv.ConvertOptions().null_values) | set(na_values)),
+        strings_can_be_null=True,
+        true_values=CSV_TRUE_VALUES,
+        false_values=CSV_FALSE_VALUES,
+    )
+    try:
+        # The first block fixes every column's type. Dates and times stay text for the
+        # datetime detector, which also reports the format they were written in
+        with pyarrow_csv.open_csv(source, convert_options=convert_options) as reader:
+            schema = reader.schema
+        names = schema.names
+        if len(set(names)) < len(names) or '' in names:
+            # pandas renames blank and repeated headers, so those files keep the C parser
+            return None
+        convert_options.column_types = {
+            field.name: pa.string() for field in schema if pa.types.is_temporal(field.type) or pa.types.is_null(field.type)
+        }
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        table = pyarrow_csv.read_csv(source, convert_options=convert_options)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        # Typically a column whose later rows stop matching the type of its first block
+        logger.info('pyarrow could not read the file, using the C parser: %s', str(e))
+        return None
+
+    df = table.to_pandas()
+    # The C parser reads a column without a single value as floats
+    for position, column in enumerate(table.columns):
+        if column.null_count == len(column) and len(column):
+            df[names[position]] = pd.Series(float('nan'), index=df.index)
+    return df
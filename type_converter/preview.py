@@ -0,0 +1,72 @@
+import io
+import logging
+import numpy as np
+import pandas as pd
+from .services import KNOWN_ERRONEOUS_ENTRIES
+from .services import detector_registry
+from .services import infer_numeric_block
+from .services import numeric_block_columns
+from .services import profile_series
+from .streaming import row_ends
+
+logger = logging.getLogger(__name__)
+
+# Rows inferred from when the caller does not say otherwise
+PREVIEW_ROWS = 500
+
+# A column whose detector held on this many values is unlikely to break later on:
+# by the rule of three, fewer than 1% of the remaining values fail with 95% confidence
+PREVIEW_CONFIDENT_VALUES = 300
+PREVIEW_MIN_VALUES = 30
+
+def preview_csv(data, rows=PREVIEW_ROWS, spread=False, truncated=False, na_values=()):
+    # A cut-off upload ends mid-row, and half a value would mislead the detectors
+    if truncated:
+        ends = row_ends(data)
+        if len(ends):
+            data = data[:ends[-1] + 1]
+
+    # One row past the limit tells whether the preview saw the whole file
+    df = pd.read_csv(io.BytesIO(data), nrows=None if spread else rows + 1, na_values=list(na_values))
+    complete = not truncated and len(df) <= rows
+    if len(df) > rows:
+        positions = np.linspace(0, len(df) - 1, rows).round().astype(int) if spread else np.arange(rows)
+        df = df.iloc[positions].reset_index(drop=True)
+    return df, complete
+
+def column_confidence(profile, complete):
+    if complete:
+        return 'high'
+    values = profile['values']
+    # Distinct ratios of a slice say little about the whole column
+    if values >= PREVIEW_CONFIDENT_VALUES and profile['inferred_as'] != 'categorical':
+        return 'high'
+    if values >= PREVIEW_MIN_VALUES:
+        return 'medium'
+    return 'low'
+
+def preview_types(df, disabled_detectors=(), complete=False, erroneous_entries=KNOWN_ERRONEOUS_ENTRIES):
+    detectors = [detector.name for detector in detector_registry.order(disabled_detectors)]
+
+    result = {
+        'rows': len(df),
+        'columns': len(df.columns),
+        'complete': complete,
+        'types': {},
+        'confidence': {},
+        'datetime_formats': {},
+    }
+    # Slices are small enough that a pool would cost more than it saves
+    block_columns = numeric_block_columns(df, df.columns, detectors)
+    profiles = {col: (converted, profile) for col, converted, profile in infer_numeric_block(df, block_columns, detectors)}
+    for col in df.columns:
+        if col in profiles:
+            converted, profile = profiles[col]
+        else:
+            _, converted, profile = profile_series(df, col, detectors=detectors, erroneous_entries=erroneous_entries)
+        result['types'][str(col)] = str(converted.dtype)
+        result['confidence'][str(col)] = column_confidence(profile, complete)
+        if 'datetime_format' in profile:
+            result['datetime_formats'][str(col)] = profile['datetime_format']
+    logger.info('Previewed %d rows and %d columns', len(df), len(df.columns))
+    return result
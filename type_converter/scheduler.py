@@ -0,0 +1,100 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+from .metrics import SCHEDULER_WAIT_SECONDS
+
+# Thread backend: one scheduler per server process runs every request's column
+# tasks on a fixed set of workers. None uses the number of CPUs
+SCHEDULER_WORKERS = None
+SCHEDULER_MAX_QUEUED = 4096
+
+class SchedulerFullError(Exception):
+    pass
+
+# Column tasks are queued per request and workers take one task from each
+# request in turn, so a very wide upload cannot starve the small ones behind it.
+class InferenceScheduler:
+    def __init__(self, workers=SCHEDULER_WORKERS, max_queued=SCHEDULER_MAX_QUEUED):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queued = max_queued
+
+        self._requests = deque()
+        self._queued = 0
+        self._running = 0
+        self._threads = []
+        self._condition = threading.Condition()
+        self._counters = {'submitted': 0, 'rejected': 0, 'completed': 0}
+
+    def configure(self, workers=None, max_queued=None):
+        with self._condition:
+            if self._threads:
+                raise RuntimeError('The inference scheduler is already running')
+            self.workers = workers or os.cpu_count() or 1
+            self.max_queued = max_queued if max_queued is not None else self.max_queued
+
+    def submit(self, calls):
+        calls = list(calls)
+        with self._condition:
+            # A request larger than the whole queue is still admitted once the queue is empty
+            if self._queued and self._queued + len(calls) > self.max_queued:
+                self._counters['rejected'] += 1
+                raise SchedulerFullError(f"{self._queued} column tasks are already queued")
+
+            now = time.monotonic()
+            tasks = deque((Future(), call, now) for call in calls)
+            futures = [future for future, _, _ in tasks]
+            if tasks:
+                self._requests.append(tasks)
+                self._queued += len(tasks)
+                self._counters['submitted'] += 1
+                self._start()
+                self._condition.notify(len(tasks))
+        return futures
+
+    def _start(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'inference-worker-{len(self._threads)}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_task(self):
+        with self._condition:
+            while not self._requests:
+                self._condition.wait()
+            tasks = self._requests.popleft()
+            task = tasks.popleft()
+            if tasks:
+                self._requests.append(tasks)
+            self._queued -= 1
+            self._running += 1
+            return task
+
+    def _work(self):
+        while True:
+            future, call, queued_at = self._next_task()
+            SCHEDULER_WAIT_SECONDS.observe(time.monotonic() - queued_at)
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(call())
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._counters['completed'] += 1
+
+    def stats(self):
+        with self._condition:
+            return {
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                'queued': self._queued,
+                'running': self._running,
+                'requests_waiting': len(self._requests),
+                **self._counters,
+            }
+
+inference_scheduler = InferenceScheduler()
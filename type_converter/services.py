@@ -1,9 +1,21 @@
+import time
 import warnings
 import logging
+import re
+import string
+import threading
+from collections import OrderedDict
+from functools import partial
+from itertools import chain
 import pandas as pd
 import numpy as np
-from concurrent.futures import ThreadPoolExecutor
-import re
+from dateutil.parser import parserinfo
+from .backends import BACKEND_AUTO
+from .backends import batched
+from .backends import column_batch_size
+from .backends import run_inference
+from .metrics import DETECTOR_SECONDS
+from .metrics import INFERENCE_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +42,61 @@ KNOWN_DURATIONS = {
     "years": 31536000
 }
 
+BOOLEAN_ALIAS_MAX_LENGTH = max(len(alias) for alias in BOOLEAN_ALIASES_TRUE | BOOLEAN_ALIASES_FALSE)
+
+# A unit runs to the end of its word, so '10 days2' and '5 hours_x' name no known unit
+DURATION_PATTERN = r"^(?P<number>\d+\.?\d*)\s*(?P<unit>[a-z]+)\b(?P<rest>.*)"
+DURATION_TERM_PATTERN = r"(?P<number>\d+\.?\d*)\s*(?P<unit>[a-z]+)\b"
+
+# A number directly followed by a known unit, required somewhere in any duration column
+DURATION_UNIT_PATTERN = r"\d\.?\s*(?:" + '|'.join(sorted(KNOWN_DURATIONS, key=len, reverse=True)) + ")"
+
+# Words dateutil understands. A value whose letters are not all such words, or short
+# upper-case time zone names, can never parse as a date.
+DATETIME_WORDS = {'now', 'today'} | {
+    name.lower()
+    for group in (parserinfo.JUMP, parserinfo.WEEKDAYS, parserinfo.MONTHS, parserinfo.HMS, parserinfo.AMPM, parserinfo.UTCZONE, parserinfo.PERTAIN)
+    for names in group
+    for name in (names if isinstance(names, tuple) else (names,))
+    if name.isalpha()
+}
+DATETIME_WORD_PATTERN = r"(?<![a-z])(?:" + '|'.join(sorted(DATETIME_WORDS, key=len, reverse=True)) + r")(?![a-z])"
+TIMEZONE_NAME_PATTERN = r"(?<![A-Za-z])[A-Z]{1,5}(?![A-Za-z])"
+DATE_LIKE_LINE_PATTERN = r"(?m)^(?=[^A-Za-z\n]*[\d\0])[^A-Za-z\n]*$"
+
+# Loose superset of what pd.to_numeric parses, any column with numbers also reaches the epoch check
+NUMBER_PATTERN = r"(?i)\s*[-+]?(?:[\d._]+(?:e[-+]?[\d_]*)?|inf(?:inity)?)\s*"
+
+# Everything the complex parser accepts once spaces are removed: Python's complex() with
+# 'i' as well as 'j', inf and nan, and the polar 'r cis(θ°)', 'r e^(θj)' and 'sqrt(r)' forms
+COMPLEX_CHARACTERS = set(string.digits + string.whitespace + '.+-_()^°eEjJ' + 'infatyINFATY' + 'cCsSqQrR')
+
+# One real number as float() reads it, the exponent must be followed by digits so that
+# '7.81e^(0.54j)' still splits into a modulus and an exponential
+COMPLEX_NUMBER = r"(?:(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:e[+-]?\d[\d_]*)?|inf(?:inity)?|nan)"
+COMPLEX_MODULUS = rf"(?:(?P<{{0}}_modulus>{COMPLEX_NUMBER})|sqrt\((?P<{{0}}_root>{COMPLEX_NUMBER})\))?"
+COMPLEX_PATTERN = re.compile(
+    # a+bj, bj, j, a±j and a plain real, optionally in parentheses
+    rf"\(?(?:(?P<real>[+-]?{COMPLEX_NUMBER})(?P<imag>[+-]{COMPLEX_NUMBER}?)[ji]"
+    rf"|(?P<imag_only>[+-]?{COMPLEX_NUMBER}?)[ji]"
+    rf"|(?P<real_only>[+-]?{COMPLEX_NUMBER}))\)?"
+    # r cis(θ°), θ in degrees
+    rf"|{COMPLEX_MODULUS.format('cis')}cis\(?(?P<cis_angle>[+-]?{COMPLEX_NUMBER})°?\)?"
+    # r e^(θj), θ in radians, and the real r e^x that polar columns write for angle zero
+    rf"|{COMPLEX_MODULUS.format('exp')}e\^\(?(?P<exp_angle>[+-]?{COMPLEX_NUMBER})(?P<exp_unit>[ji])?\)?",
+    re.IGNORECASE,
+)
+
+# Inferred types of object columns holding at least some text
+COMPLEX_INPUT_TYPES = {'string', 'mixed', 'mixed-integer', 'mixed-integer-float'}
+
+# Bare units and real e^x values parse, but a column of nothing else is single-letter codes
+# or exponents written as text
+COMPLEX_PLACEHOLDER_PATTERN = re.compile(
+    rf"\(?[ji]\)?|(?:{COMPLEX_NUMBER}|sqrt\({COMPLEX_NUMBER}\))?e\^\(?[+-]?{COMPLEX_NUMBER}\)?",
+    re.IGNORECASE,
+)
+
 # Constants for integer limits
 INT8_MIN = np.iinfo(np.int8).min
 INT8_MAX = np.iinfo(np.int8).max
@@ -40,12 +107,117 @@ INT32_MAX = np.iinfo(np.int32).max
 INT64_MIN = np.iinfo(np.int64).min
 INT64_MAX = np.iinfo(np.int64).max
 
+UNSIGNED_INTEGER_DTYPES = ['uint8', 'uint16', 'uint32', 'uint64']
+
+# Integer dtypes that can hold missing values without falling back to float64
+NULLABLE_INTEGER_DTYPES = {
+    'int8': 'Int8',
+    'int16': 'Int16',
+    'int32': 'Int32',
+    'int64': 'Int64',
+    'uint8': 'UInt8',
+    'uint16': 'UInt16',
+    'uint32': 'UInt32',
+    'uint64': 'UInt64',
+}
+
+# Largest duration that still fits in timedelta64[ns]
+TIMEDELTA_MAX_SECONDS = INT64_MAX / 1e9
+
+# Epoch timestamps by digit count: ten digits are seconds from 2001 to 2286, thirteen the same range in milliseconds
+EPOCH_UNITS = {10: 's', 13: 'ms'}
+POWERS_OF_TEN = 10.0 ** np.arange(1, 20)
+
+# Formats tried against a sample of each text column, most specific first.
+# Month-first precedes day-first so ambiguous dates read the way pandas reads them.
+DATETIME_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%m-%d-%Y',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%m/%d/%y',
+    '%d/%m/%y',
+    '%m/%d/%Y %H:%M',
+    '%d/%m/%Y %H:%M',
+    '%d %B %Y',
+    '%d %b %Y',
+    '%B %d, %Y',
+    '%b %d, %Y',
+    '%B %d %Y',
+    '%b %d %Y',
+]
+DATETIME_SAMPLE_SIZE = 200
+# Share of the sample a format has to parse before the whole column is parsed with it
+DATETIME_FORMAT_MIN_MATCH = 0.9
+# Formats remembered per value shape, so later columns that look alike try theirs first.
+# Only a tried-first hint, a column gets the format a cold worker would pick
+DATETIME_FORMAT_CACHE_SIZE = 256
+
+_datetime_formats = OrderedDict()
+_datetime_formats_lock = threading.Lock()
+
+# Columns with fewer distinct values per row than this become categorical
+CATEGORY_UNIQUE_RATIO = 0.5
+
+# Sampling mode draws this share of its rows from each end of a column, the rest at random
+SAMPLE_EDGE_SHARE = 1 / 3
+# Fixed so the same upload always samples the same rows, and caches the same answer
+SAMPLE_SEED = 0
+
+# Tables with at least this many columns take the wide path: columns go to the
+# pools in batches rather than one task each
+WIDE_TABLE_MIN_COLUMNS = 256
+
+# Cells of a numeric block copied out at once, bounding its temporary arrays
+NUMERIC_BLOCK_CELLS = 4000000
+
+# Detectors whose outcome on numbers the block statistics reproduce
+BLOCK_DETECTORS = {'boolean', 'duration', 'datetime', 'numeric', 'complex'}
+
 # Constants for float limits
 FLOAT32_MAX = np.finfo(np.float32).max
 FLOAT64_MAX = np.finfo(np.float64).max
 
-def clean_series(series):
-    return series[~series.isin(KNOWN_ERRONEOUS_ENTRIES)].dropna()
+def clean_series(series, erroneous_entries=KNOWN_ERRONEOUS_ENTRIES):
+    # Only text columns can hold the entries, and parsers given them as NA tokens
+    # already turned them into missing values, so most columns skip the scan
+    if erroneous_entries and series.dtype == object:
+        series = series[~series.isin(erroneous_entries)]
+    return series.dropna() if series.hasnans else series
+
+def numeric_dtype(min_value, max_value, abs_max, is_decimal):
+    if is_decimal:
+        if abs_max <= FLOAT32_MAX:
+            return 'float32'
+        else:
+            return 'float64'
+    else:
+        if INT8_MIN <= min_value <= INT8_MAX and max_value <= INT8_MAX:
+            return 'int8'
+        elif INT16_MIN <= min_value <= INT16_MAX and max_value <= INT16_MAX:
+            return 'int16'
+        elif INT32_MIN <= min_value <= INT32_MAX and max_value <= INT32_MAX:
+            return 'int32'
+        elif INT64_MIN <= min_value <= INT64_MAX and max_value <= INT64_MAX:
+            return 'int64'
+        else:
+            return 'float64'
+
+def compact_integer_dtype(min_value, max_value):
+    # Non-negative columns get twice the range out of the same width when unsigned
+    if min_value >= 0:
+        for dtype in UNSIGNED_INTEGER_DTYPES:
+            if max_value <= np.iinfo(dtype).max:
+                return dtype
+    return numeric_dtype(min_value, max_value, None, False)
 
 def infer_numeric_series(series):
     df_converted = pd.to_numeric(series, errors='coerce')
@@ -55,45 +227,48 @@ def infer_numeric_series(series):
 
         is_decimal = (df_converted % 1 != 0).any()
 
-        if is_decimal:
-            if df_converted.abs().max() <= FLOAT32_MAX:
-                return df_converted.astype('float32')
-            else:
-                return df_converted.astype('float64')
-        else:
-            if INT8_MIN <= min_value <= INT8_MAX and max_value <= INT8_MAX:
-                return df_converted.astype('int8')
-            elif INT16_MIN <= min_value <= INT16_MAX and max_value <= INT16_MAX:
-                return df_converted.astype('int16')
-            elif INT32_MIN <= min_value <= INT32_MAX and max_value <= INT32_MAX:
-                return df_converted.astype('int32')
-            elif INT64_MIN <= min_value <= INT64_MAX and max_value <= INT64_MAX:
-                return df_converted.astype('int64')
-            else:
-                return df_converted.astype('float64')
+        dtype = numeric_dtype(min_value, max_value, df_converted.abs().max(), is_decimal)
+        return df_converted.astype(dtype)
 
     return None
 
 def infer_duration_series(series):
-    def to_timedelta(val):
-        if isinstance(val, pd.Timedelta):
-            return val
-        if isinstance(val, str):
-            match = re.match(r"(\d+\.?\d*)\s*(\w+)", val.strip().lower())
-            if match:
-                num, unit = match.groups()
-                num = float(num)
-
-                if unit in KNOWN_DURATIONS:
-                    total_seconds = num * KNOWN_DURATIONS[unit]
-                    try:
-                        return pd.to_timedelta(total_seconds, unit='seconds')
-                    except (ValueError, OverflowError):
-                        pass
-        return pd.NaT
+    if pd.api.types.is_timedelta64_dtype(series):
+        return series if not series.isna().all() else None
+    if series.dtype != object:
+        return None
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
 
     try:
-        series_converted = series.apply(to_timedelta)
+        if inferred == 'timedelta':
+            series_converted = pd.to_timedelta(series)
+            return series_converted if not series_converted.isna().all() else None
+
+        text = series.str.strip().str.lower()
+
+        leading = text.str.extract(DURATION_PATTERN)
+        units = leading['unit'].map(KNOWN_DURATIONS)
+        seconds = pd.to_numeric(leading['number']) * units
+
+        # Compound values like "1 hour 30 minutes" add up the run of known terms that follow
+        compound = units.notna() & leading['rest'].str.strip().str.len().gt(0)
+        if compound.any():
+            terms = leading['rest'][compound].str.extractall(DURATION_TERM_PATTERN)
+            term_units = terms['unit'].map(KNOWN_DURATIONS)
+            counted = term_units.notna().groupby(level=0).cummin()
+            extra = (pd.to_numeric(terms['number']) * term_units)[counted].groupby(level=0).sum()
+            seconds = seconds.add(extra, fill_value=0).where(units.notna())
+
+        seconds = seconds.where(seconds.abs() < TIMEDELTA_MAX_SECONDS)
+
+        with np.errstate(invalid='ignore'):
+            series_converted = pd.to_timedelta(seconds, unit='s')
+
+        # Only a column of mixed types can hold Timedelta objects between its strings
+        if inferred == 'mixed':
+            timedelta_mask = series.map(type).eq(pd.Timedelta)
+            if timedelta_mask.any():
+                series_converted[timedelta_mask] = pd.to_timedelta(series[timedelta_mask])
 
         if not series_converted.isna().all():
             return series_converted
@@ -102,44 +277,188 @@ def infer_duration_series(series):
 
     return None
 
-def infer_complex_series(series):
-    try:
-        df_converted = series.apply(lambda x: complex(x.replace(' ', '') if isinstance(x, str) else np.nan))
-        if not df_converted.apply(np.isnan).all():
-            return df_converted
-    except Exception:
-        pass
+def _complex_parts(parts, name, default):
+    # Captured text to floats, float() itself handles underscores, inf and nan
+    return parts[name].fillna(default).to_numpy(dtype=object).astype('float64')
+
+def _complex_modulus(parts, prefix):
+    return np.where(parts[f'{prefix}_root'].notna(), np.sqrt(_complex_parts(parts, f'{prefix}_root', '1')), _complex_parts(parts, f'{prefix}_modulus', '1'))
+
+def parse_complex(values):
+    # values are strings without spaces, every one is matched in the same regex pass.
+    # None when any of them is not a complex number
+    parts = values.str.extract(f'^(?:{COMPLEX_PATTERN.pattern})$', flags=re.IGNORECASE)
+    algebraic = parts[['real', 'imag', 'imag_only', 'real_only']].notna().any(axis=1)
+    cis = parts['cis_angle'].notna()
+    exponential = parts['exp_angle'].notna()
+    if not (algebraic | cis | exponential).all():
+        return None
+
+    # A bare sign before the unit, as in '1-j', stands for one
+    for name in ('imag', 'imag_only'):
+        signs = parts[name].isin(['', '+', '-'])
+        parts.loc[signs, name] = parts.loc[signs, name] + '1'
+    # Parts are set directly, multiplying by 1j would turn inf+nanj into nan+nanj
+    result = np.empty(len(parts), dtype='complex128')
+    result.real = np.where(parts['real'].notna(), _complex_parts(parts, 'real', '0'), _complex_parts(parts, 'real_only', '0'))
+    result.imag = np.where(parts['imag'].notna(), _complex_parts(parts, 'imag', '0'), _complex_parts(parts, 'imag_only', '0'))
+
+    angle = np.radians(_complex_parts(parts, 'cis_angle', '0'))
+    result = np.where(cis, _complex_modulus(parts, 'cis') * np.exp(1j * angle), result)
+
+    exponent = _complex_parts(parts, 'exp_angle', '0')
+    rotation = np.exp(np.where(parts['exp_unit'].notna(), 1j * exponent, exponent))
+    return np.where(exponential, _complex_modulus(parts, 'exp') * rotation, result)
+
+def complex_placeholders_only(series):
+    values = series.dropna().astype(str).str.replace(' ', '', regex=False)
+    return bool(values.str.fullmatch(COMPLEX_PLACEHOLDER_PATTERN).all())
+
+def infer_complex_series(series, allow_placeholders=False):
+    # allow_placeholders accepts a part of a column, such as a streamed chunk, that holds
+    # only bare units or real e^x values, the caller checks the column as a whole
+    # Anything but text is left missing, as complex() never sees it
+    if series.dtype != object or len(series) == 0:
+        return None
+    # One value that is not a complex number rules out the column before any full pass
+    first = next((value for value in series if isinstance(value, str)), None)
+    if first is None or COMPLEX_PATTERN.fullmatch(first.replace(' ', '')) is None:
+        return None
+    if pd.api.types.infer_dtype(series, skipna=True) not in COMPLEX_INPUT_TYPES:
+        return None
+    values = series.str.replace(' ', '', regex=False).dropna()
+    if not allow_placeholders and complex_placeholders_only(values):
+        return None
+
+    # Columns written the way Python writes them convert in numpy's own loop, faster than
+    # any regex pass, and so do i-suffixed ones once the unit is swapped for j. Other
+    # notations, or a stray value, go through parse_complex
+    candidates = [values]
+    if first[-1:] in ('i', 'I'):
+        suffixed = values.str[-1:].isin(['i', 'I'])
+        candidates.append(values.where(~suffixed, values.str[:-1] + 'j'))
+    parsed = None
+    for candidate in candidates:
+        try:
+            parsed = candidate.to_numpy(dtype=object).astype('complex128')
+            break
+        except (TypeError, ValueError):
+            continue
+    if parsed is None:
+        parsed = parse_complex(values)
+    if parsed is None or np.isnan(parsed).all():
+        return None
+    return pd.Series(parsed, index=values.index, dtype='complex128').reindex(series.index)
+
+def digit_counts(values):
+    # Digits before the decimal point, counted on the values themselves rather than their string form
+    return np.searchsorted(POWERS_OF_TEN, np.abs(values), side='right') + 1
+
+def epoch_unit(numeric_values):
+    values = numeric_values.to_numpy(dtype='float64')
+    if len(values) == 0 or not ((values % 1 == 0).all() and (values > 0).all()):
+        return None
+    digits = np.unique(digit_counts(values))
+    if len(digits) != 1:
+        return None
+    return EPOCH_UNITS.get(int(digits[0]))
+
+def datetime_shape(values):
+    # Digit runs collapse to '0' and letter runs to 'a', so '2023-01-05' and '1/5/99' both read '0-0-0' and '0/0/0'
+    return values.str.replace(r'\d+', '0', regex=True).str.replace(r'[^\W\d_]+', 'a', regex=True)
+
+DATETIME_FORMAT_SHAPES = dict(zip(DATETIME_FORMATS, datetime_shape(pd.Series([pd.Timestamp(2000, 1, 1).strftime(fmt) for fmt in DATETIME_FORMATS]))))
+
+def sniff_datetime_format(series):
+    sample = series.dropna()
+    if sample.dtype != object or len(sample) == 0:
+        return None
+    if len(sample) > DATETIME_SAMPLE_SIZE:
+        sample = sample.iloc[np.linspace(0, len(sample) - 1, DATETIME_SAMPLE_SIZE).astype(int)]
+
+    shapes = datetime_shape(sample).dropna()
+    if len(shapes) == 0:
+        return None
+    shape = shapes.value_counts().index[0]
+
+    # Only formats that render to the sample's shape can fit it, which also keeps the
+    # lenient ISO parser from accepting timestamps under a date-only format
+    candidates = [fmt for fmt in DATETIME_FORMATS if DATETIME_FORMAT_SHAPES[fmt] == shape]
+    with _datetime_formats_lock:
+        known_format = _datetime_formats.get(shape)
+        if known_format is not None:
+            _datetime_formats.move_to_end(shape)
+
+    def match_ratio(fmt):
+        try:
+            return pd.to_datetime(sample, format=fmt, errors='coerce').notna().mean()
+        except (ValueError, TypeError):
+            return 0.0
+
+    if known_format in candidates and match_ratio(known_format) == 1:
+        # A format ahead of it that also reads the whole sample means the sample cannot tell
+        # them apart, '01/02/2020' is month-first on every worker whatever came before
+        ahead = candidates[:candidates.index(known_format)]
+        return next((fmt for fmt in ahead if match_ratio(fmt) == 1), known_format)
+
+    best_format = None
+    best_ratio = 0.0
+    for fmt in candidates:
+        ratio = match_ratio(fmt)
+        if ratio > best_ratio:
+            best_format, best_ratio = fmt, ratio
+        if ratio == 1:
+            break
+
+    if best_ratio < DATETIME_FORMAT_MIN_MATCH:
+        return None
+
+    with _datetime_formats_lock:
+        _datetime_formats[shape] = best_format
+        _datetime_formats.move_to_end(shape)
+        while len(_datetime_formats) > DATETIME_FORMAT_CACHE_SIZE:
+            _datetime_formats.popitem(last=False)
+    return best_format
+
+def parse_datetime_series(series, datetime_format):
+    if datetime_format is None:
+        return pd.to_datetime(series, errors='coerce')
 
-    return None
+    converted = pd.to_datetime(series, format=datetime_format, errors='coerce')
+    if not pd.api.types.is_datetime64_any_dtype(converted):
+        return pd.to_datetime(series, errors='coerce')
+
+    # Values that do not follow the sniffed format still get the per-value parser
+    missed = converted.isna() & series.notna()
+    if missed.any():
+        fallback = pd.to_datetime(series[missed], errors='coerce')
+        if getattr(fallback.dtype, 'tz', None) is not None:
+            fallback = fallback.dt.tz_localize(None)
+        converted = converted.where(~missed, fallback)
+    return converted
 
 def infer_datetime_series(series):
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", UserWarning)
 
-        # Heuristic for determining whether an arbitrary numeric value actually represents a timestamp:
-        # Ten-digit positive integers represent epoch seconds as it would represent time from 2001 to 2286
-        # Similarly, 13-digit integers represent milliseconds since epoch
+        # Heuristic for determining whether an arbitrary numeric value actually represents a timestamp
         numeric_series = pd.to_numeric(series, errors='coerce')
         clean_series = numeric_series.dropna()
         if len(clean_series) > 0:
-            if (clean_series == clean_series.astype(int)).all() and (clean_series > 0).all():
-                string_series = clean_series.astype(str).str.replace('.0$', '', regex=True)
-                if all(string_series.str.len() == 13):
-                    logger.info("Detected epoch milliseconds series")
-                    return pd.to_datetime(clean_series, unit='ms', errors='coerce').dt.tz_localize(None)
-                elif all(string_series.str.len() == 10):
-                    logger.info("Detected epoch seconds series")
-                    return pd.to_datetime(clean_series, unit='s', errors='coerce').dt.tz_localize(None)
-                else:
-                    return None
-            else:
+            unit = epoch_unit(clean_series)
+            if unit is None:
                 return None
+            logger.info("Detected epoch '%s' series", unit)
+            return pd.to_datetime(clean_series, unit=unit, errors='coerce')
 
         try:
-            df_converted = pd.to_datetime(series, errors='coerce')
+            datetime_format = sniff_datetime_format(series)
+            df_converted = parse_datetime_series(series, datetime_format)
 
             if not df_converted.isna().all():
-                return df_converted.dt.tz_localize(None)
+                df_converted = df_converted.dt.tz_localize(None)
+                df_converted.attrs['datetime_format'] = datetime_format
+                return df_converted
         except Exception as e:
             pass
 
@@ -169,52 +488,403 @@ def infer_boolean_series(series):
 
     return None
 
-def infer_series(df, col):
+def column_signature(series):
+    # Only columns of plain strings are screened, anything else runs every detector
+    if series.dtype != object or len(series) == 0 or pd.api.types.infer_dtype(series, skipna=False) != 'string':
+        return None
+
+    text = '\n'.join(series)
+    characters = set(text) - {'\n'}
+    lengths = series.str.len()
+    digits = sum(text.count(digit) for digit in string.digits)
+    lowered = text.lower()
+
+    # Mark every word dateutil knows, a line left with no other letters might still be a date
+    remainder = re.sub(DATETIME_WORD_PATTERN, '\0', re.sub(TIMEZONE_NAME_PATTERN, '\0', text).lower())
+
+    return {
+        'classes': sorted(
+            name for name, members in (('digit', string.digits), ('alpha', string.ascii_letters), ('space', string.whitespace), ('punctuation', string.punctuation))
+            if characters & set(members)
+        ),
+        'min_length': int(lengths.min()),
+        'max_length': int(lengths.max()),
+        'digit_ratio': digits / max(len(text) - len(series) + 1, 1),
+        'markers': ''.join(sorted(characters & set('ji:-/'))),
+        'duration_unit': re.search(DURATION_UNIT_PATTERN, lowered) is not None,
+        'number_like': bool(series.str.fullmatch(NUMBER_PATTERN).any()),
+        'date_like': re.search(DATE_LIKE_LINE_PATTERN, remainder) is not None,
+        'complex_characters': characters <= COMPLEX_CHARACTERS,
+    }
+
+class Detector:
+    def __init__(self, name, detect, dtypes, cost, after=(), screen=None):
+        self.name = name
+        self.detect = detect
+        self.dtypes = tuple(dtypes)
+        self.cost = cost
+        self.after = tuple(after)
+        self.screen = screen
+
+        self.attempts = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def hit_rate(self):
+        # Smoothed so a detector that has not run yet is neither favoured nor written off
+        return (self.hits + 1) / (self.attempts + 2)
+
+    def expected_cost(self):
+        return self.cost / self.hit_rate()
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'dtypes': list(self.dtypes),
+            'cost': self.cost,
+            'after': list(self.after),
+            'attempts': self.attempts,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate(),
+            'mean_seconds': self.seconds / self.attempts if self.attempts else None,
+        }
+
+# Detectors known to the engine. The first detector to hit decides a column, so
+# "after" lists every detector that must have missed before this one may claim
+# a column, i.e. the ones that can hit on the same values. Within those
+# constraints detectors run cheapest per expected hit first, using hit rates
+# observed across requests. Detectors registered at runtime are only seen by
+# the serial and thread backends, process workers import this module afresh.
+class DetectorRegistry:
+    def __init__(self):
+        self._detectors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, name, detect, dtypes, cost, after=(), screen=None):
+        with self._lock:
+            unknown = [other for other in after if other not in self._detectors or other == name]
+            if unknown:
+                raise ValueError(f"Detector '{name}' must run after unregistered detectors: {', '.join(unknown)}")
+            self._detectors[name] = Detector(name, detect, dtypes, cost, after, screen)
+
+    def unregister(self, name):
+        with self._lock:
+            dependants = [detector.name for detector in self._detectors.values() if name in detector.after]
+            if dependants:
+                raise ValueError(f"Detectors {', '.join(dependants)} must run after '{name}'")
+            del self._detectors[name]
+
+    def names(self):
+        with self._lock:
+            return list(self._detectors)
+
+    def get(self, name):
+        with self._lock:
+            return self._detectors[name]
+
+    def order(self, disabled=()):
+        with self._lock:
+            # Constraints are transitive, so a disabled detector still orders its neighbours
+            requires = {}
+            for detector in self._detectors.values():
+                requires[detector.name] = set(detector.after).union(*(requires[other] for other in detector.after))
+
+            pending = [detector for detector in self._detectors.values() if detector.name not in disabled]
+            enabled = {detector.name for detector in pending}
+            placed = set()
+            ordered = []
+            while pending:
+                ready = [detector for detector in pending if requires[detector.name] & enabled <= placed]
+                detector = min(ready, key=lambda detector: detector.expected_cost())
+                pending.remove(detector)
+                placed.add(detector.name)
+                ordered.append(detector)
+            return ordered
+
+    def record(self, name, outcome, seconds):
+        with self._lock:
+            detector = self._detectors.get(name)
+            # Skipped attempts never ran, they say nothing about the detector's hit rate
+            if detector is None or outcome == 'skipped':
+                return
+            detector.attempts += 1
+            detector.hits += outcome == 'hit'
+            detector.seconds += seconds
+
+    def reset_statistics(self):
+        with self._lock:
+            for detector in self._detectors.values():
+                detector.attempts = 0
+                detector.hits = 0
+                detector.seconds = 0.0
+
+    def describe(self, disabled=()):
+        return {
+            'order': [detector.name for detector in self.order(disabled)],
+            'detectors': [self.get(name).describe() for name in self.names()],
+        }
+
+detector_registry = DetectorRegistry()
+
+# Costs are relative per distinct value, measured with benchmarks/run.py
+detector_registry.register(
+    'duration', infer_duration_series, ['timedelta64[ns]'], cost=4,
+    screen=lambda signature: signature['duration_unit'],
+)
+detector_registry.register(
+    'boolean', infer_boolean_series, ['boolean'], cost=2,
+    screen=lambda signature: 'digit' not in signature['classes'] and signature['max_length'] <= BOOLEAN_ALIAS_MAX_LENGTH,
+)
+detector_registry.register(
+    'datetime', infer_datetime_series, ['datetime64[ns]'], cost=8, after=['duration', 'boolean'],
+    screen=lambda signature: signature['date_like'] or signature['number_like'],
+)
+detector_registry.register(
+    'numeric', infer_numeric_series, ['int8', 'int16', 'int32', 'int64', 'float32', 'float64'], cost=1, after=['duration', 'boolean', 'datetime'],
+    screen=lambda signature: signature['number_like'],
+)
+detector_registry.register(
+    'complex', infer_complex_series, ['complex128'], cost=3, after=['boolean', 'datetime', 'numeric'],
+    screen=lambda signature: signature['complex_characters'],
+)
+
+def possible_detectors(signature, detectors=None):
+    # A detector failing its screen on the signature cannot hit the column
+    detectors = detector_registry.order() if detectors is None else detectors
+    return {detector.name for detector in detectors if signature is None or detector.screen is None or detector.screen(signature)}
+
+def factorize_series(series):
+    # Sorting the uniques keeps categories in the same order pd.Categorical would use. They keep
+    # the column's dtype, re-inferring it would read an object column's Timestamps as datetime64
+    codes, uniques = pd.factorize(series.to_numpy(), sort=True)
+    return codes, pd.Series(uniques, dtype=series.dtype)
+
+def broadcast_series(converted, uniques, codes, index):
+    # Detectors may drop uniques they could not parse, realign to unique positions first
+    converted = converted.reindex(uniques.index)
+    return pd.Series(converted.array.take(codes), index=index)
+
+def sample_candidates(sample_uniques, confidence, attempt, detectors):
+    candidates = []
+    for detector in detectors:
+        df_converted = attempt(detector, sample_uniques)
+        if df_converted is None:
+            continue
+        # A detector that only parses a few sampled values may be seeing noise, or a
+        # type the sample barely caught, so the column gets a full scan instead
+        if df_converted.notna().sum() < confidence * len(sample_uniques):
+            return None
+        candidates.append(detector)
+    return candidates
+
+def stratified_sample(series, sample_size):
+    if len(series) <= sample_size:
+        return series
+    edge = int(sample_size * SAMPLE_EDGE_SHARE / 2)
+    middle = np.random.default_rng(SAMPLE_SEED).choice(len(series) - 2 * edge, size=sample_size - 2 * edge, replace=False)
+    positions = np.concatenate([np.arange(edge), np.sort(middle) + edge, np.arange(len(series) - edge, len(series))])
+    return series.iloc[positions]
+
+def profile_series(df, col, sampling=None, optimize_memory=False, detectors=None, erroneous_entries=KNOWN_ERRONEOUS_ENTRIES):
     logger.debug("Starting type inference for column '%s'", col)
+    started = time.perf_counter()
 
-    series = clean_series(df[col])
+    series = clean_series(df[col], erroneous_entries)
     logger.debug("Cleaned series for column '%s'", col)
 
-    # Attempt to convert to duration
-    df_converted = infer_duration_series(series)
-    if df_converted is not None:
-        logger.info("Column '%s' inferred as 'duration'", col)
-        return col, df_converted.reindex(df.index)
-
-    # Attempt to convert to boolean
-    df_converted = infer_boolean_series(series)
-    if df_converted is not None:
-        logger.info("Column '%s' inferred as 'boolean'", col)
-        return col, df_converted.reindex(df.index)
-
-    # Attempt to convert to datetime
-    df_converted = infer_datetime_series(series)
-    if df_converted is not None:
-        logger.info("Column '%s' inferred as 'datetime'", col)
-        return col, df_converted.reindex(df.index)
-
-    # Attempt to convert to a numeric series
-    df_converted = infer_numeric_series(series)
-    if df_converted is not None:
-        logger.info("Column '%s' inferred as 'numeric'", col)
-        return col, df_converted.reindex(df.index)
-
-    # Attempt to convert to complex numbers
-    df_converted = infer_complex_series(series)
-    if df_converted is not None:
-        logger.info("Column '%s' inferred as 'complex'", col)
-        return col, df_converted.reindex(df.index)
+    # Every detector is element-wise, so it only needs to parse each distinct value once
+    codes, uniques = factorize_series(series)
+    logger.debug("Factorized column '%s' into %d unique values", col, len(uniques))
+
+    # Detectors travel by name so process workers look up their own copies
+    detectors = detector_registry.order() if detectors is None else [detector_registry.get(name) for name in detectors]
+
+    # One pass over the distinct values rules out detectors that cannot possibly hit
+    signature = column_signature(uniques)
+    possible = possible_detectors(signature, detectors)
+
+    profile = {
+        'column': str(col),
+        'rows': len(df),
+        'values': len(series),
+        'unique_values': len(uniques),
+        'signature': signature,
+        'prepare_seconds': time.perf_counter() - started,
+        'attempts': [],
+    }
+
+    def finish(name, converted):
+        # Without dropped rows the converted values already line up with the frame
+        if len(series) < len(df):
+            converted = converted.reindex(df.index)
+        profile['inferred_as'] = name
+        profile['seconds'] = time.perf_counter() - started
+        return col, converted, profile
+
+    def attempt(detector, values, stage):
+        if detector.name not in possible:
+            profile['attempts'].append({'detector': detector.name, 'stage': stage, 'seconds': 0.0, 'rows_scanned': 0, 'outcome': 'skipped'})
+            return None
+        attempt_started = time.perf_counter()
+        df_converted = detector.detect(values)
+        profile['attempts'].append({
+            'detector': detector.name,
+            'stage': stage,
+            'seconds': time.perf_counter() - attempt_started,
+            'rows_scanned': len(values),
+            'outcome': 'hit' if df_converted is not None else 'miss',
+        })
+        return df_converted
+
+    candidates = detectors
+    if sampling is not None and len(series) > sampling['sample_size']:
+        _, sample_uniques = factorize_series(stratified_sample(series, sampling['sample_size']))
+        candidates = sample_candidates(sample_uniques, sampling['confidence'], partial(attempt, stage='sample'), detectors)
+        profile['sample_candidates'] = [detector.name for detector in candidates] if candidates is not None else None
+        # A sample no detector parses may still have missed the values that decide the column
+        if not candidates:
+            logger.debug("Sample of column '%s' is inconclusive, scanning every detector", col)
+            candidates = detectors
+
+    # The full pass only verifies the sampled candidates, then falls back to the rest
+    # of the cascade if none of them holds for the whole column
+    fallback = [] if candidates is detectors else [detector for detector in detectors if detector not in candidates]
+    for stage_detectors, stage in ((candidates, 'full'), (fallback, 'fallback')):
+        for detector in stage_detectors:
+            name = detector.name
+            df_converted = attempt(detector, uniques, stage)
+            if df_converted is not None:
+                logger.info("Column '%s' inferred as '%s'", col, name)
+                if df_converted.attrs.get('datetime_format') is not None:
+                    profile['datetime_format'] = df_converted.attrs['datetime_format']
+                is_integer = optimize_memory and pd.api.types.is_integer_dtype(df_converted.dtype) and name == 'numeric'
+                if is_integer:
+                    df_converted = df_converted.astype(compact_integer_dtype(df_converted.min(), df_converted.max()))
+                converted = broadcast_series(df_converted, uniques, codes, series.index)
+                # Rows dropped by clean_series come back as missing, which only nullable integers can hold
+                if is_integer and len(series) < len(df):
+                    converted = converted.astype(NULLABLE_INTEGER_DTYPES[str(converted.dtype)])
+                return finish(name, converted)
 
     # Check if the column should be categorical
     if len(series) != 0:
-        unique_ratio = len(series.unique()) / len(series)
-        if unique_ratio < 0.5:
+        unique_ratio = len(uniques) / len(series)
+        if unique_ratio < CATEGORY_UNIQUE_RATIO:
             logger.info("Column '%s' inferred as 'categorical'", col)
-            categorical_series = pd.Series(pd.Categorical(series), index=series.index)
-            return col, categorical_series.reindex(df.index)
+            categorical_series = pd.Series(pd.Categorical.from_codes(codes, categories=uniques), index=series.index)
+            return finish('categorical', categorical_series)
 
     logger.info("Column '%s' remains as 'object'", col)
-    return col, series.reindex(df.index)
+    return finish('object', series)
+
+def infer_series(df, col):
+    col, converted, _ = profile_series(df, col)
+    return col, converted
+
+def numeric_block_columns(df, columns, detectors):
+    # Numbers can only hit the boolean, epoch and numeric detectors, so block statistics
+    # decide them exactly unless numeric is off or an unknown detector might claim them
+    names = set(detectors)
+    if 'numeric' not in names or not names <= BLOCK_DETECTORS:
+        return []
+    dtypes = df.dtypes
+    return [col for col in columns if dtypes[col].kind in 'iuf']
+
+def infer_numeric_block(df, columns, detectors, optimize_memory=False):
+    groups = {}
+    for col in columns:
+        groups.setdefault(df[col].dtype, []).append(col)
+
+    results = []
+    for group in groups.values():
+        for chunk in batched(group, max(1, NUMERIC_BLOCK_CELLS // max(len(df), 1))):
+            results.extend(_infer_numeric_chunk(df, chunk, set(detectors), optimize_memory))
+    return results
+
+def _infer_numeric_chunk(df, columns, detectors, optimize_memory):
+    started = time.perf_counter()
+    values = df[columns].to_numpy()
+    rows = len(values)
+
+    # Per column at once: how many values, their range and whether any has a fraction.
+    # Infinities count as fractions, as they do in infer_numeric_series
+    if values.dtype.kind == 'f':
+        valid = ~np.isnan(values)
+        with np.errstate(invalid='ignore'):
+            minimum = np.where(valid, values, np.inf).min(axis=0, initial=np.inf)
+            maximum = np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf)
+            decimal = (valid & (np.mod(values, 1) != 0)).any(axis=0)
+    else:
+        valid = np.ones(values.shape, dtype=bool)
+        minimum = values.min(axis=0, initial=np.iinfo(values.dtype).max)
+        maximum = values.max(axis=0, initial=np.iinfo(values.dtype).min)
+        decimal = np.zeros(values.shape[1], dtype=bool)
+    counts = valid.sum(axis=0)
+    digits = digit_counts(np.stack([minimum, maximum]).astype('float64'))
+
+    names = []
+    targets = []
+    for position in range(len(columns)):
+        low, high = minimum[position], maximum[position]
+        is_decimal = bool(decimal[position])
+        target = None
+        if counts[position] == 0:
+            name = 'object'
+        elif 'boolean' in detectors and not is_decimal and low >= 0 and high <= 1:
+            name = 'boolean'
+        elif 'datetime' in detectors and not is_decimal and low > 0 and digits[0, position] == digits[1, position] and int(digits[0, position]) in EPOCH_UNITS:
+            name = 'datetime'
+        else:
+            name = 'numeric'
+            target = numeric_dtype(low, high, max(abs(low), abs(high)), is_decimal)
+            if target.startswith('int'):
+                # Same outcome as broadcasting the distinct values back over the missing rows
+                if optimize_memory:
+                    target = compact_integer_dtype(low, high)
+                    target = NULLABLE_INTEGER_DTYPES[target] if counts[position] < rows else target
+                elif counts[position] < rows:
+                    target = 'float64'
+        names.append(name)
+        targets.append(target)
+
+    # Columns sharing a plain numpy target are cast together
+    converted = {}
+    by_target = {}
+    for position, target in enumerate(targets):
+        if target is not None and target not in NULLABLE_INTEGER_DTYPES.values():
+            by_target.setdefault(target, []).append(position)
+    for target, positions in by_target.items():
+        block = values[:, positions].astype(target)
+        for index, position in enumerate(positions):
+            converted[position] = block[:, index]
+
+    seconds = (time.perf_counter() - started) / len(columns)
+    results = []
+    for position, col in enumerate(columns):
+        name = names[position]
+        column = values[:, position]
+        if name == 'object':
+            converted_col = df[col].array
+        elif name == 'boolean':
+            converted_col = pd.arrays.BooleanArray(column == 1, ~valid[:, position])
+        elif name == 'datetime':
+            unit = EPOCH_UNITS[int(digits[0, position])]
+            converted_col = pd.to_datetime(pd.Series(column), unit=unit, errors='coerce').array
+        elif position in converted:
+            converted_col = converted[position]
+        else:
+            converted_col = pd.array(column, dtype=targets[position])
+        logger.debug("Column '%s' inferred as '%s' from its block", col, name)
+        results.append((col, converted_col, {
+            'column': str(col),
+            'rows': rows,
+            'values': int(counts[position]),
+            'stage': 'block',
+            'seconds': seconds,
+            'attempts': [],
+            'inferred_as': name,
+        }))
+    return results
 
 def convert_column_type(series, type_hint):
     if type_hint == "object":
@@ -245,29 +915,80 @@ def convert_column_type(series, type_hint):
         logger.info(f"Unexpected type hint: {type_hint}")
         return series
 
-def infer_and_convert_data_types(dataset):
+def infer_and_convert_data_types(
+    dataset, backend=BACKEND_AUTO, on_column=None, profile=None, sampling=None, optimize_memory=False, disabled_detectors=(), wide=None,
+    erroneous_entries=KNOWN_ERRONEOUS_ENTRIES,
+):
     df = dataset.dataframe
+    started = time.perf_counter()
 
     logger.info("Data types before inference:\n%s", df.dtypes)
 
     type_hints_dict = {col: dtype for col, dtype in dataset.type_hints}
     logger.debug("Type hints dict: %s", type_hints_dict)
 
-    with ThreadPoolExecutor() as executor:
-        future_to_col = {}
-        for col in df.columns:
-            if col in type_hints_dict:
-                logger.debug("Converting column '%s' to '%s'", col, type_hints_dict[col])
-                df[col] = convert_column_type(df[col], type_hints_dict[col])
-            else:
-                logger.debug("Inferring type for column '%s'", col)
-                future_to_col[executor.submit(infer_series, df, col)] = col
-
-        for future in future_to_col:
-            col, converted_col = future.result()
-            logger.debug("Completed inference for column '%s'", col)
-            df[col] = converted_col
-
-    logger.info("Data types after inference:\n%s", df.dtypes)
-
-    return df.dtypes
+    column_count = len(df.columns)
+    completed = 0
+
+    # Memory is measured before any column changes, deep so text columns count their strings
+    if optimize_memory:
+        memory_before = df.memory_usage(deep=True, index=False)
+
+    # Converted columns are collected and the result built once at the end, writing them
+    # back one at a time fragments the frame's blocks on wide tables
+    converted_columns = {}
+    inferred_columns = []
+    for col in df.columns:
+        if col in type_hints_dict:
+            logger.debug("Converting column '%s' to '%s'", col, type_hints_dict[col])
+            converted_columns[col] = convert_column_type(df[col], type_hints_dict[col]).array
+            completed += 1
+            if on_column is not None:
+                on_column(col, str(converted_columns[col].dtype), completed, column_count)
+        else:
+            logger.debug("Inferring type for column '%s'", col)
+            inferred_columns.append(col)
+
+    # One order for the whole upload, taken from the hit rates seen so far
+    detectors = [detector.name for detector in detector_registry.order(disabled_detectors)]
+    logger.debug("Detector order: %s", detectors)
+
+    # Columns the parser already read as numbers never go through the text detectors
+    block_columns = numeric_block_columns(df, inferred_columns, detectors)
+    block_results = infer_numeric_block(df, block_columns, detectors, optimize_memory) if block_columns else []
+    if block_columns:
+        logger.info("Inferred %d numeric columns as blocks", len(block_columns))
+        block_columns = set(block_columns)
+        inferred_columns = [col for col in inferred_columns if col not in block_columns]
+    wide = column_count >= WIDE_TABLE_MIN_COLUMNS if wide is None else wide
+    batch_size = column_batch_size(len(df), len(inferred_columns)) if wide else 1
+
+    infer = partial(profile_series, sampling=sampling, optimize_memory=optimize_memory, detectors=detectors, erroneous_entries=erroneous_entries)
+    results = chain(block_results, run_inference(infer, df, inferred_columns, backend=backend, batch_size=batch_size))
+    for col, converted_col, column_profile in results:
+        logger.debug("Completed inference for column '%s'", col)
+        converted_columns[col] = converted_col.array if isinstance(converted_col, pd.Series) else converted_col
+        if 'datetime_format' in column_profile:
+            dataset.datetime_formats[col] = column_profile['datetime_format']
+        for attempt in column_profile['attempts']:
+            DETECTOR_SECONDS.observe(attempt['seconds'], detector=attempt['detector'], outcome=attempt['outcome'])
+            detector_registry.record(attempt['detector'], attempt['outcome'], attempt['seconds'])
+        if profile is not None:
+            profile.append(column_profile)
+        completed += 1
+        if on_column is not None:
+            on_column(col, str(converted_col.dtype), completed, column_count)
+
+    # Keyed by position so the original column labels, whatever their type, carry over as they are
+    result = pd.DataFrame({position: converted_columns[col] for position, col in enumerate(df.columns)}, index=df.index, copy=False)
+    result.columns = df.columns
+    dataset.dataframe = result
+
+    if optimize_memory:
+        memory_after = result.memory_usage(deep=True, index=False)
+        dataset.memory_usage = {col: {'before': int(memory_before[col]), 'after': int(memory_after[col])} for col in df.columns}
+
+    INFERENCE_SECONDS.observe(time.perf_counter() - started)
+    logger.info("Data types after inference:\n%s", result.dtypes)
+
+    return result.dtypes
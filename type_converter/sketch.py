@@ -0,0 +1,98 @@
+import math
+import numpy as np
+import pandas as pd
+
+# Default relative standard error of distinct counts once a column outgrows the exact set
+DISTINCT_ERROR = 0.01
+
+# Distinct values counted exactly before only the sketch is kept, 8 bytes each
+EXACT_DISTINCT_LIMIT = 65536
+
+# Estimates are trusted within this many standard errors
+DISTINCT_ERROR_BOUND = 3
+
+HLL_MIN_PRECISION = 4
+HLL_MAX_PRECISION = 18
+
+def hash_values(series):
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+def _bit_length(values):
+    # frexp is exact on 32-bit halves, a float64 cast of the full word could round up
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+class HyperLogLog:
+    def __init__(self, precision):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def for_error(cls, error):
+        precision = math.ceil(math.log2((1.04 / error) ** 2))
+        return cls(min(max(precision, HLL_MIN_PRECISION), HLL_MAX_PRECISION))
+
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, hashes):
+        if len(hashes) == 0:
+            return
+        # The top bits pick a register, which keeps the longest run of leading zeros seen in the rest
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        rank = (width + 1 - _bit_length(hashes & np.uint64((1 << width) - 1))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        # Linear counting is more accurate while many registers are still empty
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return float(raw)
+
+# Exact while small, a HyperLogLog sketch afterwards. Memory per column is bounded
+# by the exact limit plus the sketch registers, whatever the column's cardinality.
+class DistinctCounter:
+    def __init__(self, error=DISTINCT_ERROR, exact_limit=EXACT_DISTINCT_LIMIT):
+        self.exact_limit = exact_limit
+        self.sketch = HyperLogLog.for_error(error)
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def is_exact(self):
+        return self.hashes is not None
+
+    def update(self, hashes):
+        self.sketch.update(hashes)
+        if self.hashes is not None:
+            self.hashes = np.union1d(self.hashes, hashes)
+            if len(self.hashes) > self.exact_limit:
+                self.hashes = None
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        if self.hashes is not None and other.hashes is not None:
+            self.hashes = np.union1d(self.hashes, other.hashes)
+            if len(self.hashes) > self.exact_limit:
+                self.hashes = None
+        else:
+            self.hashes = None
+        return self
+
+    def estimate(self):
+        return len(self.hashes) if self.hashes is not None else self.sketch.estimate()
+
+    def bounds(self):
+        if self.hashes is not None:
+            return len(self.hashes), len(self.hashes)
+        estimate = self.sketch.estimate()
+        margin = DISTINCT_ERROR_BOUND * self.sketch.relative_error() * estimate
+        # A sketch only exists past the exact limit, so that is a floor as well
+        return max(estimate - margin, self.exact_limit + 1), estimate + margin
@@ -0,0 +1,321 @@
+import warnings
+import logging
+import pandas as pd
+import numpy as np
+from .services import clean_series
+from .services import factorize_series
+from .services import convert_column_type
+from .services import infer_duration_series
+from .services import infer_boolean_series
+from .services import infer_datetime_series
+from .services import complex_placeholders_only
+from .services import infer_complex_series
+from .services import numeric_dtype
+from .services import column_signature
+from .services import possible_detectors
+from .services import compact_integer_dtype
+from .services import NULLABLE_INTEGER_DTYPES
+from .services import digit_counts
+from .services import EPOCH_UNITS
+from .services import CATEGORY_UNIQUE_RATIO
+from .services import KNOWN_ERRONEOUS_ENTRIES
+from .sketch import DistinctCounter
+from .sketch import DISTINCT_ERROR
+from .sketch import hash_values
+
+logger = logging.getLogger(__name__)
+
+# Number of rows parsed at a time when streaming a CSV upload
+DEFAULT_CHUNK_SIZE = 100000
+
+def _merge_raw_dtype(left, right):
+    if left is None:
+        return right
+    if right is None or left == right:
+        return left
+    if 'object' in (left, right):
+        return 'object'
+    return str(np.result_type(left, right))
+
+# Mergeable summary of one column, built chunk by chunk. Holds just enough state
+# to replay the infer_series cascade without keeping the column in memory.
+# Only the built-in detectors are replayed, registered extensions are not.
+class ColumnAccumulator:
+    def __init__(self, name, type_hint=None, disabled=(), distinct_error=DISTINCT_ERROR, erroneous_entries=KNOWN_ERRONEOUS_ENTRIES):
+        self.name = name
+        self.type_hint = type_hint
+        self.disabled = set(disabled)
+        self.erroneous_entries = erroneous_entries
+        self.hinted_dtype = None
+        self.raw_dtype = None
+        self.rows = 0
+        self.valid = 0
+
+        self.duration_hits = 0
+
+        self.boolean_failed = False
+        self.boolean_from_numbers = False
+        self.saw_text = False
+
+        self.has_numeric = False
+        self.has_non_numeric = False
+        self.min_value = None
+        self.max_value = None
+        self.abs_max = None
+        self.has_fraction = False
+
+        self.epoch_candidate = True
+        self.epoch_digits = set()
+        self.datetime_hits = 0
+        self.datetime_format = None
+
+        self.complex_hits = 0
+        self.complex_failed = False
+        # Whether any chunk held more than bare units and real e^x values
+        self.complex_marked = False
+
+        self.distinct = DistinctCounter(distinct_error)
+        # Exact count from a second pass, only taken when the estimate is too close to call
+        self.distinct_count = None
+
+    def update(self, series):
+        self.rows += len(series)
+        self.raw_dtype = _merge_raw_dtype(self.raw_dtype, str(series.dtype))
+
+        if self.type_hint is not None:
+            self.hinted_dtype = str(convert_column_type(series, self.type_hint).dtype)
+            return
+
+        series = clean_series(series, self.erroneous_entries)
+        if len(series) == 0:
+            return
+        self.valid += len(series)
+        if series.dtype == object:
+            self.saw_text = True
+
+        # Detectors are element-wise, so each chunk only needs its distinct values parsed
+        _, series = factorize_series(series)
+        # A disabled detector behaves exactly like one the screen ruled out
+        possible = possible_detectors(column_signature(series)) - self.disabled
+
+        # A single duration anywhere decides the column, nothing else matters
+        if self.duration_hits > 0:
+            return
+        converted = infer_duration_series(series) if 'duration' in possible else None
+        if converted is not None:
+            self.duration_hits += int(converted.notna().sum())
+            return
+
+        if not self.boolean_failed:
+            if 'boolean' not in possible or infer_boolean_series(series) is None:
+                self.boolean_failed = True
+            elif series.dtype != object and series.dtype != bool:
+                self.boolean_from_numbers = True
+
+        self._update_numeric(series)
+
+        if self.has_numeric and 'numeric' not in self.disabled:
+            return
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            converted = infer_datetime_series(series) if 'datetime' in possible else None
+        if converted is not None:
+            self.datetime_hits += int(converted.notna().sum())
+            self.datetime_format = self.datetime_format or converted.attrs.get('datetime_format')
+
+        if not self.complex_failed:
+            if 'complex' not in possible or infer_complex_series(series, allow_placeholders=True) is None:
+                self.complex_failed = True
+            else:
+                self.complex_hits += len(series)
+                self.complex_marked = self.complex_marked or not complex_placeholders_only(series)
+
+        self.distinct.update(hash_values(series))
+
+    def _update_numeric(self, series):
+        numeric_series = pd.to_numeric(series, errors='coerce')
+        numeric_values = numeric_series.dropna()
+        if len(numeric_values) == 0:
+            return
+
+        self.has_numeric = True
+        self.has_non_numeric = self.has_non_numeric or len(numeric_values) < len(numeric_series)
+        self.has_fraction = self.has_fraction or bool((numeric_values % 1 != 0).any())
+        self._update_bounds(numeric_values.min(), numeric_values.max(), numeric_values.abs().max())
+
+        if self.epoch_candidate:
+            # Mirrors epoch_unit in infer_datetime_series, digit counts merge as a set
+            values = numeric_values.to_numpy(dtype='float64')
+            if (values % 1 == 0).all() and (values > 0).all():
+                self.epoch_digits.update(np.unique(digit_counts(values)).tolist())
+            else:
+                self.epoch_candidate = False
+
+    def _update_bounds(self, min_value, max_value, abs_max):
+        self.min_value = min_value if self.min_value is None else min(self.min_value, min_value)
+        self.max_value = max_value if self.max_value is None else max(self.max_value, max_value)
+        self.abs_max = abs_max if self.abs_max is None else max(self.abs_max, abs_max)
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.valid += other.valid
+        self.raw_dtype = _merge_raw_dtype(self.raw_dtype, other.raw_dtype)
+        self.hinted_dtype = other.hinted_dtype or self.hinted_dtype
+        self.duration_hits += other.duration_hits
+        self.boolean_failed = self.boolean_failed or other.boolean_failed
+        self.boolean_from_numbers = self.boolean_from_numbers or other.boolean_from_numbers
+        self.saw_text = self.saw_text or other.saw_text
+        self.has_non_numeric = self.has_non_numeric or other.has_non_numeric
+        if other.has_numeric:
+            self.has_numeric = True
+            self.has_fraction = self.has_fraction or other.has_fraction
+            self._update_bounds(other.min_value, other.max_value, other.abs_max)
+        self.epoch_candidate = self.epoch_candidate and other.epoch_candidate
+        self.epoch_digits |= other.epoch_digits
+        self.datetime_hits += other.datetime_hits
+        self.datetime_format = self.datetime_format or other.datetime_format
+        self.complex_hits += other.complex_hits
+        self.complex_failed = self.complex_failed or other.complex_failed
+        self.complex_marked = self.complex_marked or other.complex_marked
+        self.distinct.merge(other.distinct)
+        return self
+
+    def is_boolean(self):
+        if self.valid == 0 or self.boolean_failed:
+            return False
+        # Numeric 0/1 values are read back as strings once the column holds any text
+        return not (self.saw_text and self.boolean_from_numbers)
+
+    def is_epoch(self):
+        if not self.epoch_candidate:
+            return False
+        return len(self.epoch_digits) == 1 and next(iter(self.epoch_digits)) in EPOCH_UNITS
+
+    def _categorical_bounds(self):
+        threshold = CATEGORY_UNIQUE_RATIO * self.valid
+        if self.distinct_count is not None:
+            return self.distinct_count < threshold, self.distinct_count < threshold
+        low, high = self.distinct.bounds()
+        return high < threshold, low < threshold
+
+    def is_categorical(self):
+        certain, possible = self._categorical_bounds()
+        if certain or not possible:
+            return certain
+        # Too close to call without an exact count, go with the estimate
+        return self.distinct.estimate() < CATEGORY_UNIQUE_RATIO * self.valid
+
+    def needs_exact_count(self):
+        certain, possible = self._categorical_bounds()
+        return certain != possible and self.inferred_dtype() in ('category', 'object')
+
+    def inferred_dtype(self, optimize_memory=False):
+        if self.type_hint is not None:
+            return self.hinted_dtype or self.raw_dtype
+        if self.duration_hits > 0:
+            return 'timedelta64[ns]'
+        if self.is_boolean():
+            return 'boolean'
+        if self.has_numeric and self.is_epoch() and 'datetime' not in self.disabled:
+            return 'datetime64[ns]'
+        if self.has_numeric and 'numeric' not in self.disabled:
+            # Values that fail to parse are NaN, which infer_numeric_series counts as fractional
+            dtype = numeric_dtype(self.min_value, self.max_value, self.abs_max, self.has_fraction or self.has_non_numeric)
+            if dtype.startswith('int') and optimize_memory:
+                dtype = compact_integer_dtype(self.min_value, self.max_value)
+                return NULLABLE_INTEGER_DTYPES[dtype] if self.valid < self.rows else dtype
+            # Rows dropped by clean_series come back as NaN, which integers cannot hold
+            if dtype.startswith('int') and self.valid < self.rows:
+                return 'float64'
+            return dtype
+        if self.datetime_hits > 0:
+            return 'datetime64[ns]'
+        if not self.complex_failed and self.complex_hits > 0 and self.complex_marked:
+            return 'complex128'
+        if self.valid != 0 and self.is_categorical():
+            return 'category'
+        # Columns pandas already parsed keep their dtype when every detector missed
+        if self.valid == 0 or not self.saw_text:
+            return self.raw_dtype
+        return 'object'
+
+def update_accumulators(
+    accumulators, chunk, type_hints=None, disabled_detectors=(), distinct_error=DISTINCT_ERROR, erroneous_entries=KNOWN_ERRONEOUS_ENTRIES,
+):
+    type_hints_dict = {col: dtype for col, dtype in (type_hints or [])}
+    logger.debug("Accumulating chunk of %d rows", len(chunk))
+    for col in chunk.columns:
+        if col not in accumulators:
+            accumulators[col] = ColumnAccumulator(col, type_hints_dict.get(col), disabled_detectors, distinct_error, erroneous_entries)
+        accumulators[col].update(chunk[col])
+    return accumulators
+
+def infer_streaming_dtypes(chunks, type_hints=None, disabled_detectors=(), distinct_error=DISTINCT_ERROR, erroneous_entries=KNOWN_ERRONEOUS_ENTRIES):
+    accumulators = {}
+    for chunk in chunks:
+        update_accumulators(accumulators, chunk, type_hints, disabled_detectors, distinct_error, erroneous_entries)
+    return accumulators
+
+def count_distinct_exact(accumulators, chunks):
+    # Second pass for the columns whose estimate straddles the categorical threshold.
+    # Each stops as soon as it has clearly too many distinct values.
+    pending = {col: accumulator for col, accumulator in accumulators.items() if accumulator.needs_exact_count()}
+    seen = {col: np.empty(0, dtype=np.uint64) for col in pending}
+
+    for chunk in chunks:
+        if not pending:
+            break
+        for col in list(pending):
+            series = clean_series(chunk[col], pending[col].erroneous_entries)
+            if len(series) == 0:
+                continue
+            _, series = factorize_series(series)
+            seen[col] = np.union1d(seen[col], hash_values(series))
+            if len(seen[col]) >= CATEGORY_UNIQUE_RATIO * pending[col].valid:
+                pending.pop(col).distinct_count = len(seen[col])
+
+    for col, accumulator in pending.items():
+        accumulator.distinct_count = len(seen[col])
+    return accumulators
+
+def streaming_result(accumulators, read_columns, optimize_memory=False, on_column=None):
+    # Columns whose distinct estimate is too close to the categorical threshold get an exact
+    # recount, read_columns returns the chunks again restricted to the given column positions
+    ambiguous = [position for position, accumulator in enumerate(accumulators.values()) if accumulator.needs_exact_count()]
+    if ambiguous:
+        logger.info('Recounting distinct values of %d columns', len(ambiguous))
+        count_distinct_exact(accumulators, read_columns(ambiguous))
+
+    row_count = next(iter(accumulators.values())).rows if accumulators else 0
+    column_count = len(accumulators)
+    logger.info('File contains %d rows and %d columns.', row_count, column_count)
+
+    types = {}
+    for col, accumulator in accumulators.items():
+        types[col] = accumulator.inferred_dtype(optimize_memory)
+        if on_column is not None:
+            on_column(col, types[col], len(types), column_count)
+
+    return {
+        'rows': row_count,
+        'columns': column_count,
+        'types': types,
+        'datetime_formats': {
+            col: accumulator.datetime_format
+            for col, accumulator in accumulators.items()
+            if accumulator.datetime_format is not None and accumulator.inferred_dtype() == 'datetime64[ns]'
+        },
+    }
+
+def row_ends(data):
+    # Newlines outside quoted fields, escaped quotes are doubled so parity still holds
+    values = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(values == ord('\n'))
+    quotes = np.cumsum(values == ord('"'))
+    return newlines[quotes[newlines] % 2 == 0]
+
+def read_csv_chunks(file_obj, chunk_size=DEFAULT_CHUNK_SIZE, usecols=None, na_values=()):
+    with pd.read_csv(file_obj, chunksize=chunk_size, usecols=usecols, na_values=list(na_values)) as reader:
+        for chunk in reader:
+            yield chunk
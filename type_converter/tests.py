@@ -1,7 +1,82 @@
+import io
+import contextlib
+import os
+import sys
+import glob
+import json
+import unittest
+import importlib.util
+from functools import partial
+import time
+import tempfile
+import threading
+import asyncio
+import subprocess
+import numpy
 import pandas
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.test import RequestFactory
+from django.test import override_settings
+from benchmarks.generator import generate_csv
+from benchmarks.load import parse_mix
+from benchmarks.load import schedule
+from benchmarks.load import summarize
+from benchmarks.load import synthetic_requests
+from benchmarks.run import compare as compare_benchmarks
 from type_converter.services import infer_and_convert_data_types
+from type_converter.services import infer_series
+from type_converter.services import infer_duration_series
+from type_converter.services import infer_datetime_series
+from type_converter.services import infer_complex_series
+from type_converter.services import sniff_datetime_format
+from type_converter.services import profile_series
+from type_converter.services import stratified_sample
+from type_converter.services import column_signature
+from type_converter.services import possible_detectors
+from type_converter.services import clean_series
+from type_converter.services import detector_registry
+from type_converter.services import DetectorRegistry
 from type_converter.models import Dataset
+from type_converter.views import inference_cache
+from type_converter.views import job_queue
+from type_converter.parsing import read_csv
+from type_converter.jobs import JobQueue
+from type_converter.metrics import Histogram
+from type_converter.jobs import JobStore
+from type_converter.jobs import JOB_INTERRUPTED_ERROR
+from type_converter.jobs import QueueFullError
+from type_converter.backends import attach_series
+from type_converter.backends import choose_backend
+from type_converter.backends import column_batch_size
+from type_converter.backends import share_series
+from type_converter.scheduler import InferenceScheduler
+from type_converter.scheduler import inference_scheduler
+from type_converter.scheduler import SchedulerFullError
+from type_converter.cache import InferenceCache
+from type_converter.preview import preview_csv
+from type_converter.warmup import start_warm_up
+from type_converter.warmup import warm_up
+from type_converter.management.commands.importtime import package_totals
+from type_converter.management.commands.importtime import parse_importtime
+from type_converter.preview import preview_types
+from type_converter.cache import cache_key
+from type_converter.cache import content_hash
+from type_converter.excel import infer_workbook
+from type_converter.excel import read_sheet_chunks
+from type_converter.uploads import HashedUploadedFile
+from type_converter.uploads import HashingUploadHandler
+from type_converter.streaming import ColumnAccumulator
+from type_converter.streaming import infer_streaming_dtypes
+from type_converter.streaming import read_csv_chunks
+from type_converter.streaming import count_distinct_exact
+from type_converter.asgi import IncrementalCSVInference
+from type_converter.asgi import async_upload_application
+from type_converter.views import infer_file_streaming
+from type_converter.views import infer_excel_path
+from type_converter.sketch import DistinctCounter
+from type_converter.sketch import HyperLogLog
+from type_converter.sketch import hash_values
 
 class InferenceTests(TestCase):
     def test_floats(self):
@@ -51,7 +126,34 @@ class InferenceTests(TestCase):
         dataframe = pandas.read_csv('./datasets/sample_complex.csv')
         dataset = Dataset(name="sample_data", dataframe=dataframe, type_hints=[])
         dtypes = infer_and_convert_data_types(dataset)
-        self.assertEqual(dtypes['complex_col_algebraic'], 'complex128')
+        for col in ('complex_col_algebraic', 'complex_col_trigonometric', 'complex_col_exponential', 'complex_col_cartesian'):
+            self.assertEqual(dtypes[col], 'complex128')
+        converted = dataset.dataframe
+        self.assertAlmostEqual(converted['complex_col_trigonometric'][1], -1.79 + 3.58j, places=2)
+        self.assertEqual(converted['complex_col_trigonometric'][4], 1)
+        self.assertAlmostEqual(converted['complex_col_exponential'][1], -1.98 - 4.01j, places=2)
+        self.assertEqual(converted['complex_col_cartesian'][1], -2 - 4j)
+    def test_complex_notations(self):
+        cases = [
+            (['1+2j', '(3-4J)', '-j', '1_000j', 'inf+nanj'], [1 + 2j, 3 - 4j, -1j, 1000j, complex(float('inf'), float('nan'))]),
+            (['5+3i', '-2 - 4i', '3.5', 'i'], [5 + 3j, -2 - 4j, 3.5, 1j]),
+            (['2cis(90°)', 'cis(-90)', 'sqrt(4)cis(180°)'], [2j, -1j, -2]),
+            (['2e^(3.141592653589793j)', 'e^(0j)', '3e^(1.5707963267948966i)'], [-2, 1, 3j]),
+            (['2cis(90°)', 'e^0', '2e^1', '-i', 'j'], [2j, 1, 2 * numpy.e, -1j, 1j]),
+        ]
+        for values, expected in cases:
+            with self.subTest(values=values):
+                converted = infer_complex_series(pandas.Series(values))
+                numpy.testing.assert_allclose(converted.to_numpy(), expected, atol=1e-12)
+    def test_complex_rejects_text(self):
+        cases = (
+            ['Alpha', '1+2j'], ['1+2j', 'Alpha'], ['pi'], [1.5, 2.5],
+            # Single-letter codes and real exponents on their own are text, not complex numbers
+            ['i', 'j', 'I'], ['(j)', 'i'], ['e^2', 'e^3', 'e^1'],
+        )
+        for values in cases:
+            with self.subTest(values=values):
+                self.assertIsNone(infer_complex_series(pandas.Series(values)))
     def test_dates(self):
         dataframe = pandas.read_csv('./datasets/sample_dates.csv')
         dataset = Dataset(name="sample_data", dataframe=dataframe, type_hints=[])
@@ -64,3 +166,826 @@ class InferenceTests(TestCase):
         #self.assertEqual(dtypes['date_col_short'], 'datetime64[ns]')
         self.assertEqual(dtypes['epoch_seconds'], 'datetime64[ns]')
         self.assertEqual(dtypes['epoch_milliseconds'], 'datetime64[ns]')
+
+class FactorizedEngineTests(TestCase):
+    def test_broadcasts_unique_results(self):
+        dataframe = pandas.DataFrame({'flag': ['yes', 'no', 'N/A', 'yes', 'no', 'yes']})
+        _, converted = infer_series(dataframe, 'flag')
+        self.assertEqual(str(converted.dtype), 'boolean')
+        self.assertEqual(converted.tolist(), [True, False, pandas.NA, True, False, True])
+    def test_categorical_reuses_factorization(self):
+        dataframe = pandas.read_csv('./datasets/sample_categorical.csv')
+        _, converted = infer_series(dataframe, 'category_col_seasons')
+        self.assertEqual(list(converted.cat.categories), ['Autumn', 'Spring', 'Summer', 'Winter'])
+        self.assertEqual(converted.tolist(), dataframe['category_col_seasons'].tolist())
+    def test_uniques_keep_the_column_dtype(self):
+        values = pandas.Series([pandas.Timestamp(2020, 1, 1), '2020-01-02', pandas.Timestamp(2020, 1, 1)], dtype=object)
+        _, converted = infer_series(pandas.DataFrame({'when': values}), 'when')
+        self.assertEqual(str(converted.dtype), 'datetime64[ns]')
+        self.assertTrue(converted.equals(infer_datetime_series(values)))
+
+class DurationParserTests(TestCase):
+    def test_compound_durations(self):
+        series = pandas.Series(['1 hour 30 minutes', '2 days, 3 hours', '45 Seconds', 'about 3 hours', 'error'])
+        converted = infer_duration_series(series)
+        self.assertEqual(converted[0], pandas.Timedelta(minutes=90))
+        self.assertEqual(converted[1], pandas.Timedelta(hours=51))
+        self.assertEqual(converted[2], pandas.Timedelta(seconds=45))
+        self.assertTrue(pandas.isna(converted[3]))
+        self.assertTrue(pandas.isna(converted[4]))
+    def test_rejects_non_durations(self):
+        self.assertIsNone(infer_duration_series(pandas.Series([1, 2, 3])))
+        self.assertIsNone(infer_duration_series(pandas.Series(['Alpha', 'Beta'])))
+        self.assertIsNone(infer_duration_series(pandas.Series(['5 apples'])))
+        self.assertIsNone(infer_duration_series(pandas.Series(['5 hours_x', '10 days2'])))
+    def test_timedelta_objects(self):
+        converted = infer_duration_series(pandas.Series([pandas.Timedelta(hours=1), None], dtype=object))
+        self.assertEqual(converted[0], pandas.Timedelta(hours=1))
+        converted = infer_duration_series(pandas.Series([pandas.Timedelta(hours=1), '2 days'], dtype=object))
+        self.assertEqual(list(converted), [pandas.Timedelta(hours=1), pandas.Timedelta(days=2)])
+
+class DatetimeFormatTests(TestCase):
+    def test_sniffs_sample_formats(self):
+        self.assertEqual(sniff_datetime_format(pandas.Series(['2023-01-05', '2023-03-15'])), '%Y-%m-%d')
+        self.assertEqual(sniff_datetime_format(pandas.Series(['2023-01-05T00:00:00Z'])), '%Y-%m-%dT%H:%M:%SZ')
+        self.assertEqual(sniff_datetime_format(pandas.Series(['02-10-2023', '04-20-2023'])), '%m-%d-%Y')
+        self.assertEqual(sniff_datetime_format(pandas.Series(['5 January 2023', '12 March 2023'])), '%d %B %Y')
+        self.assertIsNone(sniff_datetime_format(pandas.Series(['Alpha', 'Beta'])))
+    def test_day_first_column_parses_consistently(self):
+        converted = infer_datetime_series(pandas.Series(['10/02/2023', '20/04/2023'] * 10 + ['junk']))
+        self.assertEqual(converted.attrs['datetime_format'], '%d/%m/%Y')
+        self.assertEqual(converted[0], pandas.Timestamp(2023, 2, 10))
+        self.assertTrue(pandas.isna(converted[20]))
+    def test_reuses_format_for_similar_columns(self):
+        infer_datetime_series(pandas.Series(['10.02.2023', '20.04.2023']))
+        self.assertEqual(sniff_datetime_format(pandas.Series(['01.02.2023', '03.04.2023'])), '%d.%m.%Y')
+    def test_earlier_columns_do_not_change_ambiguous_dates(self):
+        ambiguous = pandas.Series(['01/02/2020', '03/04/2020'])
+        self.assertEqual(sniff_datetime_format(ambiguous), '%m/%d/%Y')
+        infer_datetime_series(pandas.Series(['13/01/2020', '20/04/2020']))
+        self.assertEqual(sniff_datetime_format(ambiguous), '%m/%d/%Y')
+        self.assertEqual(sniff_datetime_format(pandas.Series(['13/01/2020', '03/04/2020'])), '%d/%m/%Y')
+    def test_off_format_values_still_parse(self):
+        converted = infer_datetime_series(pandas.Series(['2023-01-05'] * 20 + ['March 3, 2023']))
+        self.assertEqual(converted.iloc[-1], pandas.Timestamp(2023, 3, 3))
+    def test_epoch_integers(self):
+        converted = infer_datetime_series(pandas.Series([1609459200, 1613001600]))
+        self.assertEqual(converted[0], pandas.Timestamp(2021, 1, 1))
+        self.assertEqual(infer_datetime_series(pandas.Series([1609459200000, 1613001600000]))[1], pandas.Timestamp(2021, 2, 11))
+        self.assertIsNone(infer_datetime_series(pandas.Series([1609459200, 16130016000])))
+        self.assertIsNone(infer_datetime_series(pandas.Series([1609459200.5])))
+    def test_formats_in_response(self):
+        inference_cache.clear()
+        with open('./datasets/sample_dates.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/', {'file': f})
+        self.assertEqual(response.json()['datetime_formats']['date_col_dmy'], '%d/%m/%Y')
+
+class SignatureScreenTests(TestCase):
+    def test_plain_text_skips_every_detector(self):
+        dataframe = pandas.read_csv('./datasets/sample_complex.csv')
+        _, converted, profile = profile_series(dataframe, 'string_col')
+        self.assertEqual({attempt['outcome'] for attempt in profile['attempts'] if attempt['detector'] != 'boolean'}, {'skipped'})
+        self.assertEqual(profile['inferred_as'], 'object')
+    def test_screens_keep_possible_detectors(self):
+        cases = [
+            (['1 hour 30 minutes', 'soon'], {'duration', 'datetime'}),
+            (['yes', 'no'], {'boolean'}),
+            (['January', 'Alpha'], {'boolean', 'datetime'}),
+            (['2023-01-05T00:00:00Z'], {'datetime'}),
+            (['1+2j', '3-4j'], {'complex'}),
+            (['3cis(59.04°)', '7.81e^(0.54j)', 'sqrt(2)cis(135°)'], {'complex'}),
+            (['20231e5', 'x'], {'datetime', 'numeric'}),
+            (['-Infinity'], {'datetime', 'numeric', 'complex'}),
+        ]
+        for values, expected in cases:
+            with self.subTest(values=values):
+                self.assertEqual(possible_detectors(column_signature(pandas.Series(values))), expected)
+    def test_screened_detectors_never_hit(self):
+        for path in sorted(glob.glob('./datasets/*.csv')):
+            dataframe = pandas.read_csv(path)
+            for col in dataframe.columns:
+                values = dataframe[col].dropna()
+                possible = possible_detectors(column_signature(values))
+                for detector in detector_registry.order():
+                    if detector.name not in possible:
+                        with self.subTest(path=path, col=col, detector=detector.name):
+                            self.assertIsNone(detector.detect(values))
+    def test_non_text_columns_are_not_screened(self):
+        self.assertIsNone(column_signature(pandas.Series([1, 2, 3])))
+        self.assertIsNone(column_signature(pandas.Series(['a', 1.5])))
+
+class DetectorRegistryTests(TestCase):
+    def test_order_follows_hit_rates_within_precedence(self):
+        registry = DetectorRegistry()
+        registry.register('cheap', lambda values: None, ['object'], cost=1)
+        registry.register('costly', lambda values: None, ['object'], cost=4)
+        registry.register('late', lambda values: None, ['object'], cost=1, after=['costly'])
+        self.assertEqual([detector.name for detector in registry.order()], ['cheap', 'costly', 'late'])
+        for _ in range(50):
+            registry.record('costly', 'hit', 0.01)
+            registry.record('cheap', 'miss', 0.01)
+        self.assertEqual([detector.name for detector in registry.order()], ['costly', 'late', 'cheap'])
+        self.assertEqual([detector.name for detector in registry.order(disabled=['costly'])], ['late', 'cheap'])
+        self.assertEqual(registry.describe()['detectors'][1]['hits'], 50)
+    def test_register_rejects_unknown_predecessors(self):
+        registry = DetectorRegistry()
+        with self.assertRaises(ValueError):
+            registry.register('first', lambda values: None, ['object'], cost=1, after=['missing'])
+        registry.register('first', lambda values: None, ['object'], cost=1)
+        registry.register('second', lambda values: None, ['object'], cost=1, after=['first'])
+        with self.assertRaises(ValueError):
+            registry.unregister('first')
+    def test_disabled_detectors_match_streaming(self):
+        for path in ('./datasets/sample_floats.csv', './datasets/sample_dates.csv', './datasets/sample_booleans.csv'):
+            for disabled in (['numeric', 'complex'], ['datetime'], ['duration']):
+                dataset = Dataset(name='sample_data', dataframe=pandas.read_csv(path), type_hints=[])
+                dtypes = infer_and_convert_data_types(dataset, disabled_detectors=disabled)
+                accumulators = infer_streaming_dtypes(read_csv_chunks(path, 3), disabled_detectors=disabled)
+                for col, accumulator in accumulators.items():
+                    with self.subTest(path=path, disabled=disabled, col=col):
+                        self.assertEqual(accumulator.inferred_dtype(), str(dtypes[col]))
+    def test_views_expose_and_disable_detectors(self):
+        described = self.client.get('/type-detector/detectors/').json()
+        self.assertEqual(sorted(described['order']), ['boolean', 'complex', 'datetime', 'duration', 'numeric'])
+        self.assertLess(described['order'].index('datetime'), described['order'].index('numeric'))
+        with open('./datasets/sample_dates.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?disable=datetime', {'file': f})
+        self.assertNotIn('datetime64[ns]', response.json()['types'].values())
+        with open('./datasets/sample_dates.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?disable=bogus', {'file': f})
+        self.assertEqual(response.status_code, 400)
+
+class SamplingModeTests(TestCase):
+    def test_matches_full_scan(self):
+        for path in sorted(glob.glob('./datasets/*.csv')):
+            expected = infer_and_convert_data_types(Dataset(name="sample_data", dataframe=pandas.read_csv(path), type_hints=[]))
+            for sample_size in (3, 5, 8):
+                with self.subTest(path=path, sample_size=sample_size):
+                    dataset = Dataset(name="sample_data", dataframe=pandas.read_csv(path), type_hints=[])
+                    dtypes = infer_and_convert_data_types(dataset, sampling={'sample_size': sample_size, 'confidence': 0.99})
+                    self.assertTrue(dtypes.equals(expected))
+    def test_stratified_sample(self):
+        sample = stratified_sample(pandas.Series(range(1000)), 30)
+        self.assertEqual(len(sample), 30)
+        self.assertEqual(list(sample[:5]), [0, 1, 2, 3, 4])
+        self.assertEqual(list(sample[-5:]), [995, 996, 997, 998, 999])
+        self.assertTrue(sample.equals(stratified_sample(pandas.Series(range(1000)), 30)))
+    def test_sample_missing_the_minority_type(self):
+        columns = {
+            'dates': ['text %d' % i for i in range(2000)] + ['2020-01-01'],
+            'numbers': ['1', '2', 'abc', 'def'],
+        }
+        for col, values in columns.items():
+            with self.subTest(col=col):
+                frame = pandas.DataFrame({col: values})
+                _, expected, _ = profile_series(frame, col)
+                _, converted, profile = profile_series(frame, col, sampling={'sample_size': 2, 'confidence': 0.99})
+                self.assertEqual(profile['sample_candidates'], [])
+                self.assertEqual(converted.dtype, expected.dtype)
+    def test_failed_verification_falls_back(self):
+        values = [0, 1] * 500
+        values[500] = 2
+        _, converted, profile = profile_series(pandas.DataFrame({'col': values}), 'col', sampling={'sample_size': 10, 'confidence': 0.99})
+        self.assertEqual(profile['sample_candidates'], ['boolean', 'numeric'])
+        self.assertEqual([(a['detector'], a['outcome']) for a in profile['attempts'] if a['stage'] == 'full'], [('boolean', 'miss'), ('numeric', 'hit')])
+        self.assertEqual(str(converted.dtype), 'int8')
+    def test_inconclusive_sample_scans_everything(self):
+        values = ['Alpha', 'Beta', 'Gamma', 'Delta', '2023-01-05'] * 10
+        _, _, profile = profile_series(pandas.DataFrame({'col': values}), 'col', sampling={'sample_size': 10, 'confidence': 0.99})
+        self.assertIsNone(profile['sample_candidates'])
+        self.assertEqual(profile['inferred_as'], 'datetime')
+    def test_view_options(self):
+        inference_cache.clear()
+        with open('./datasets/sample_integers.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?sample=1&sample_size=4', {'file': f})
+        self.assertEqual(response.json()['types']['int16_col'], 'int16')
+        with open('./datasets/sample_integers.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?sample=1&confidence=2', {'file': f})
+        self.assertEqual(response.status_code, 400)
+
+class MemoryOptimizationTests(TestCase):
+    def test_nullable_and_unsigned_integers(self):
+        dataset = Dataset(name="sample_data", dataframe=pandas.read_csv('./datasets/sample_data.csv'), type_hints=[])
+        dtypes = infer_and_convert_data_types(dataset, optimize_memory=True)
+        self.assertEqual(dtypes['Score'], 'UInt8')
+        self.assertTrue(dataset.dataframe['Score'].isna().any())
+        self.assertLess(dataset.memory_usage['Score']['after'], dataset.memory_usage['Score']['before'])
+        dtypes = infer_and_convert_data_types(Dataset(name="sample_data", dataframe=pandas.read_csv('./datasets/sample_integers.csv'), type_hints=[]), optimize_memory=True)
+        self.assertEqual(dtypes['int8_col'], 'int8')
+    def test_default_mode_unchanged(self):
+        dataset = Dataset(name="sample_data", dataframe=pandas.read_csv('./datasets/sample_data.csv'), type_hints=[])
+        self.assertEqual(infer_and_convert_data_types(dataset)['Score'], 'float64')
+        self.assertEqual(dataset.memory_usage, {})
+    def test_categorical_codes_are_narrow(self):
+        dataset = Dataset(name="sample_data", dataframe=pandas.read_csv('./datasets/sample_categorical.csv'), type_hints=[])
+        infer_and_convert_data_types(dataset, optimize_memory=True)
+        self.assertEqual(dataset.dataframe['category_col_seasons'].cat.codes.dtype, 'int8')
+    def test_streaming_matches_in_memory(self):
+        for path in sorted(glob.glob('./datasets/*.csv')):
+            expected = infer_and_convert_data_types(Dataset(name="sample_data", dataframe=pandas.read_csv(path), type_hints=[]), optimize_memory=True)
+            accumulators = infer_streaming_dtypes(read_csv_chunks(path, 4))
+            for col, accumulator in accumulators.items():
+                with self.subTest(path=path, col=col):
+                    self.assertEqual(accumulator.inferred_dtype(optimize_memory=True), str(expected[col]))
+    def test_view_reports_memory(self):
+        inference_cache.clear()
+        with open('./datasets/sample_data.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?optimize=1', {'file': f})
+        self.assertEqual(response.json()['types']['Score'], 'UInt8')
+        self.assertIn('before', response.json()['memory_usage']['Score'])
+        with open('./datasets/sample_data.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/', {'file': f})
+        self.assertEqual(response.json()['types']['Score'], 'float64')
+        self.assertNotIn('memory_usage', response.json())
+
+class ExportTests(TestCase):
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_arrow_stream_keeps_dtypes(self):
+        import pyarrow
+        with open('./datasets/sample_complex.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?format=arrow&optimize=1', {'file': f})
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.arrow.stream')
+        table = pyarrow.ipc.open_stream(b''.join(response.streaming_content)).read_all()
+        self.assertEqual(table.num_rows, len(pandas.read_csv('./datasets/sample_complex.csv')))
+        self.assertEqual(json.loads(table.schema.metadata[b'type_converter.dtypes'])['complex_col_algebraic'], 'complex128')
+        self.assertTrue(pyarrow.types.is_struct(table.schema.field('complex_col_algebraic').type))
+        self.assertTrue(pyarrow.types.is_boolean(table.schema.field('bool_col').type))
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_parquet_export(self):
+        import pyarrow.parquet
+        with open('./datasets/sample_categorical.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?format=parquet', {'file': f})
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(b''.join(response.streaming_content)))
+        self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('category_col_seasons').type))
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is not None, 'pyarrow is installed')
+    def test_export_without_pyarrow(self):
+        with open('./datasets/sample_data.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?format=arrow', {'file': f})
+        self.assertEqual(response.status_code, 501)
+    def test_unknown_format(self):
+        with open('./datasets/sample_data.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?format=xml', {'file': f})
+        self.assertEqual(response.status_code, 400)
+
+@unittest.skipIf(importlib.util.find_spec('openpyxl') is None, 'openpyxl is not installed')
+class ExcelTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f'{directory.name}/workbook.xlsx'
+        with pandas.ExcelWriter(self.path) as writer:
+            for name in ('sample_booleans', 'sample_dates', 'sample_data'):
+                pandas.read_csv(f'./datasets/{name}.csv').to_excel(writer, sheet_name=name, index=False)
+    def test_sheets_match_in_memory_inference(self):
+        results = infer_workbook(self.path)
+        self.assertEqual(list(results), ['sample_booleans', 'sample_dates', 'sample_data'])
+        for sheet, result in results.items():
+            dataframe = pandas.read_excel(self.path, sheet_name=sheet)
+            expected = infer_and_convert_data_types(Dataset(name=sheet, dataframe=dataframe, type_hints=[]))
+            with self.subTest(sheet=sheet):
+                self.assertEqual(result['types'], {col: str(dtype) for col, dtype in expected.items()})
+                self.assertEqual(result['rows'], len(dataframe))
+    def test_reports_columns_as_sheets_finish(self):
+        progress = []
+        result = infer_excel_path(self.path, 'workbook.xlsx', [], on_column=lambda *args: progress.append(args))
+        total = sum(sheet['columns'] for sheet in result['sheets'].values())
+        self.assertEqual([done for _, _, done, _ in progress], list(range(1, total + 1)))
+        self.assertEqual({column_total for _, _, _, column_total in progress}, {total})
+        self.assertIn(('sample_data/Score', result['sheets']['sample_data']['types']['Score']), [args[:2] for args in progress])
+    def test_rows_are_read_in_batches(self):
+        chunks = list(read_sheet_chunks(self.path, 'sample_dates', columns=['epoch_seconds', 'string_col'], batch_rows=5))
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5, 2])
+        self.assertEqual(list(chunks[0].columns), ['epoch_seconds', 'string_col'])
+    def test_view_selects_sheets_and_columns(self):
+        with open(self.path, 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?sheets=sample_dates,sample_data&columns=string_col,bool_col', {'file': f})
+        self.assertEqual(response.status_code, 400)
+        with open(self.path, 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?sheets=sample_dates,sample_booleans&columns=string_col', {'file': f})
+        body = response.json()
+        self.assertEqual(list(body['sheets']), ['sample_dates', 'sample_booleans'])
+        self.assertEqual(body['types'], body['sheets']['sample_dates']['types'])
+        self.assertEqual(list(body['sheets']['sample_booleans']['types']), ['string_col'])
+    def test_preview_reads_sheet_head(self):
+        with open(self.path, 'rb') as f:
+            body = self.client.post('/type-detector/previews/?sheets=sample_dates&rows=5', {'file': f}).json()
+        self.assertEqual((body['sheet'], body['rows'], body['complete']), ('sample_dates', 5, False))
+        self.assertIn('epoch_seconds', body['types'])
+
+class ExecutionBackendTests(TestCase):
+    def test_backends_agree(self):
+        for path in ('./datasets/sample_booleans.csv', './datasets/sample_dates.csv', './datasets/sample_complex.csv'):
+            expected = infer_and_convert_data_types(Dataset(name="sample_data", dataframe=pandas.read_csv(path), type_hints=[]), backend='serial')
+            for backend in ('thread', 'process'):
+                with self.subTest(path=path, backend=backend):
+                    dtypes = infer_and_convert_data_types(Dataset(name="sample_data", dataframe=pandas.read_csv(path), type_hints=[]), backend=backend)
+                    self.assertTrue(dtypes.equals(expected))
+    def test_shared_series_round_trip(self):
+        blocks = []
+        try:
+            for series in (pandas.Series([1, 2, 3]), pandas.Series(['Alpha', None, 'Gamma', '']), pandas.Series(['a', 1, 2.5])):
+                self.assertTrue(attach_series(share_series(series, blocks)).equals(series))
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+    def test_choose_backend(self):
+        self.assertEqual(choose_backend(10, 8), 'serial')
+        self.assertEqual(choose_backend(100000, 1), 'serial')
+        self.assertIn(choose_backend(100000, 100), ('thread', 'process'))
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            infer_and_convert_data_types(Dataset(name="sample_data", dataframe=pandas.DataFrame({'a': [1]}), type_hints=[]), backend='gpu')
+
+class ParseNATests(TestCase):
+    def test_entries_are_missing_at_parse_time(self):
+        data = b'score,label\n1,a\nN/A,b\nunknown,c\n2.5,-\n'
+        df = read_csv(io.BytesIO(data), ['N/A', 'unknown'], engine='c')
+        self.assertEqual(str(df['score'].dtype), 'float64')
+        self.assertEqual(df['label'].tolist(), ['a', 'b', 'c', '-'])
+    def test_na_values_per_request(self):
+        data = b'score,label\n1,a\n-,b\n2,c\n'
+        for query, values in (('', 3), ('&na_values=-', 2)):
+            response = self.client.post(f'/type-detector/inferences/?profile=1{query}', {'file': SimpleUploadedFile('scores.csv', data)})
+            columns = {column['column']: column for column in response.json()['profile']['columns']}
+            with self.subTest(query=query):
+                self.assertEqual(columns['score']['values'], values)
+    def test_streaming_honours_na_values(self):
+        data = b'score\n1\n-\n2\n'
+        self.assertEqual(infer_file_streaming(io.BytesIO(data), 'scores.csv', [], na_values=['-'])['types']['score'], 'float64')
+    def test_numbers_skip_the_scan(self):
+        series = pandas.Series([1.0, 2.0, 3.0])
+        self.assertIs(clean_series(series), series)
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_pyarrow_engine_matches_c_parser(self):
+        for path in sorted(glob.glob('./datasets/*.csv')):
+            expected = read_csv(path, ['N/A', 'Not Available', 'unknown'], engine='c')
+            df = read_csv(path, ['N/A', 'Not Available', 'unknown'], engine='pyarrow')
+            with self.subTest(path=path):
+                self.assertEqual(list(df.columns), list(expected.columns))
+                self.assertEqual(df.dtypes.astype(str).tolist(), expected.dtypes.astype(str).tolist())
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_pyarrow_falls_back_to_c_parser(self):
+        # Repeated headers are renamed by the C parser only
+        df = read_csv(io.BytesIO(b'a,a\n1,2\n'), engine='pyarrow')
+        self.assertEqual(list(df.columns), ['a', 'a.1'])
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            read_csv(io.BytesIO(b'a\n1\n'), engine='python')
+
+class WideTableTests(TestCase):
+    def test_wide_path_matches_column_path(self):
+        frames = [pandas.read_csv(path) for path in sorted(glob.glob('./datasets/*.csv'))]
+        buffer = io.StringIO()
+        generate_csv(buffer, 300, 28, null_ratio=0.2)
+        buffer.seek(0)
+        frames.append(pandas.read_csv(buffer))
+        for dataframe in frames:
+            for optimize_memory in (False, True):
+                narrow = Dataset(name='narrow', dataframe=dataframe.copy(), type_hints=[])
+                wide = Dataset(name='wide', dataframe=dataframe.copy(), type_hints=[])
+                infer_and_convert_data_types(narrow, optimize_memory=optimize_memory, wide=False)
+                infer_and_convert_data_types(wide, optimize_memory=optimize_memory, wide=True, backend='thread')
+                with self.subTest(columns=list(dataframe.columns)[:3], optimize_memory=optimize_memory):
+                    pandas.testing.assert_frame_equal(wide.dataframe, narrow.dataframe)
+    def test_numeric_columns_are_decided_as_blocks(self):
+        dataframe = pandas.DataFrame({'flag': [0, 1, 1], 'epoch': [1600000000, 1700000000, 1650000000], 'reading': [0.5, None, 2.0], 'label': ['a', 'b', 'c']})
+        profile = []
+        dtypes = infer_and_convert_data_types(Dataset(name='wide', dataframe=dataframe, type_hints=[]), profile=profile, wide=True)
+        self.assertEqual([str(dtype) for dtype in dtypes], ['boolean', 'datetime64[ns]', 'float32', 'object'])
+        self.assertEqual({column['column']: column.get('stage') for column in profile}, {'flag': 'block', 'epoch': 'block', 'reading': 'block', 'label': None})
+    def test_column_batch_size(self):
+        self.assertEqual(column_batch_size(1000, 20000, workers=4), 200)
+        self.assertEqual(column_batch_size(10000000, 20000, workers=4), 1)
+        self.assertEqual(column_batch_size(10, 3, workers=4), 1)
+
+class InferenceSchedulerTests(TestCase):
+    def test_requests_interleave(self):
+        scheduler = InferenceScheduler(workers=1)
+        release = threading.Event()
+        order = []
+        def task(name):
+            release.wait(5)
+            order.append(name)
+        wide = scheduler.submit(partial(task, f'wide {i}') for i in range(20))
+        narrow = scheduler.submit(partial(task, f'narrow {i}') for i in range(2))
+        release.set()
+        for future in wide + narrow:
+            future.result(5)
+        self.assertLess(order.index('narrow 1'), order.index('wide 4'))
+        self.assertEqual(scheduler.stats()['completed'], 22)
+    def test_full_queue_rejects(self):
+        scheduler = InferenceScheduler(workers=1, max_queued=3)
+        release = threading.Event()
+        futures = scheduler.submit([lambda: release.wait(5)] * 3)
+        with self.assertRaises(SchedulerFullError):
+            scheduler.submit([lambda: None] * 3)
+        release.set()
+        for future in futures:
+            future.result(5)
+        self.assertEqual(scheduler.stats()['rejected'], 1)
+        self.assertEqual(scheduler.stats()['queued'], 0)
+        # A request larger than the queue still runs once the queue has drained
+        self.assertEqual([future.result(5) for future in scheduler.submit([lambda: 1] * 5)], [1] * 5)
+    def test_full_queue_rejects_process_backend(self):
+        release = threading.Event()
+        max_queued = inference_scheduler.max_queued
+        inference_scheduler.max_queued = 1
+        try:
+            # Every worker busy and one task waiting behind them
+            futures = inference_scheduler.submit([lambda: release.wait(5)] * (inference_scheduler.workers + 1))
+            dataset = Dataset(name="sample_data", dataframe=pandas.DataFrame({'a': ['1', '2'], 'b': ['x', 'y']}), type_hints=[])
+            with self.assertRaises(SchedulerFullError):
+                infer_and_convert_data_types(dataset, backend='process')
+        finally:
+            inference_scheduler.max_queued = max_queued
+            release.set()
+        for future in futures:
+            future.result(5)
+
+class StreamingInferenceTests(TestCase):
+    def assertMatchesInMemory(self, path, chunk_size):
+        dataset = Dataset(name="sample_data", dataframe=pandas.read_csv(path), type_hints=[])
+        expected = {col: str(dtype) for col, dtype in infer_and_convert_data_types(dataset).items()}
+        accumulators = infer_streaming_dtypes(read_csv_chunks(path, chunk_size=chunk_size))
+        self.assertEqual({col: acc.inferred_dtype() for col, acc in accumulators.items()}, expected)
+    def test_matches_in_memory(self):
+        for path in sorted(glob.glob('./datasets/*.csv')):
+            for chunk_size in (1, 4, 100):
+                with self.subTest(path=path, chunk_size=chunk_size):
+                    self.assertMatchesInMemory(path, chunk_size)
+    def test_reports_columns(self):
+        progress = []
+        with open('./datasets/sample_dates.csv', 'rb') as f:
+            result = infer_file_streaming(f, 'sample_dates.csv', [], on_column=lambda *args: progress.append(args))
+        self.assertEqual({col: dtype for col, dtype, _, _ in progress}, result['types'])
+        self.assertEqual(progress[-1][2:], (result['columns'], result['columns']))
+    def test_merge(self):
+        dataframe = pandas.read_csv('./datasets/sample_dates.csv')
+        for col in dataframe.columns:
+            whole = ColumnAccumulator(col)
+            whole.update(dataframe[col])
+            merged = ColumnAccumulator(col)
+            for part in (dataframe[col][:5], dataframe[col][5:]):
+                accumulator = ColumnAccumulator(col)
+                accumulator.update(part)
+                merged.merge(accumulator)
+            self.assertEqual(merged.inferred_dtype(), whole.inferred_dtype())
+            self.assertEqual(merged.rows, len(dataframe))
+    def test_streaming_view(self):
+        inference_cache.clear()
+        with open('./datasets/sample_integers.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?stream=1', {'file': f})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rows'], 13)
+        self.assertEqual(response.json()['types']['int16_col'], 'int16')
+
+class PreviewTests(TestCase):
+    def test_truncated_upload_drops_partial_row(self):
+        data = b'id,when\n' + b''.join(f'{i},2024-01-{i % 28 + 1:02d}\n'.encode() for i in range(40)) + b'40,2024-0'
+        df, complete = preview_csv(data, rows=100, truncated=True)
+        self.assertEqual(len(df), 40)
+        self.assertFalse(complete)
+        result = preview_types(df, complete=complete)
+        self.assertEqual(result['types'], {'id': 'int8', 'when': 'datetime64[ns]'})
+        self.assertEqual(result['confidence'], {'id': 'medium', 'when': 'medium'})
+    def test_row_limit_and_spread(self):
+        data = b'n\n' + b''.join(f'{i}\n'.encode() for i in range(100))
+        df, complete = preview_csv(data, rows=10)
+        self.assertEqual(df['n'].tolist(), list(range(10)))
+        self.assertFalse(complete)
+        df, _ = preview_csv(data, rows=3, spread=True)
+        self.assertEqual(df['n'].tolist(), [0, 50, 99])
+        df, complete = preview_csv(data, rows=100)
+        self.assertTrue(complete)
+    def test_preview_view(self):
+        with open('./datasets/sample_data.csv', 'rb') as f:
+            expected = self.client.post('/type-detector/inferences/', {'file': f}).json()['types']
+        with open('./datasets/sample_data.csv', 'rb') as f:
+            response = self.client.post('/type-detector/previews/', {'file': f})
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(body['complete'])
+        self.assertEqual(body['types'], expected)
+        self.assertEqual(set(body['confidence'].values()), {'high'})
+        with open('./datasets/sample_data.csv', 'rb') as f:
+            response = self.client.post('/type-detector/previews/?rows=0', {'file': f})
+        self.assertEqual(response.status_code, 400)
+
+def post_asgi(application, body, path='/type-detector/inferences/async/', query=b'name=upload.csv', method='POST', piece=16):
+    pieces = [body[start:start + piece] for start in range(0, len(body), piece)] or [b'']
+    messages = [{'type': 'http.request', 'body': data, 'more_body': i < len(pieces) - 1} for i, data in enumerate(pieces)]
+    sent = []
+    async def receive():
+        return messages.pop(0)
+    async def send(message):
+        sent.append(message)
+    asyncio.run(application({'type': 'http', 'path': path, 'method': method, 'query_string': query}, receive, send))
+    return sent
+
+class UploadHandlerTests(TestCase):
+    def test_upload_is_hashed_while_spooled(self):
+        with open('./datasets/sample_data.csv', 'rb') as f:
+            data = f.read()
+        request = RequestFactory().post('/type-detector/inferences/', {'file': SimpleUploadedFile('sample_data.csv', data)})
+        upload = request.FILES['file']
+        self.assertIsInstance(upload, HashedUploadedFile)
+        self.assertEqual(upload.content_hash, content_hash([data]))
+        self.assertEqual(upload.size, len(data))
+        self.assertEqual(upload.row_estimate(), len(pandas.read_csv(io.BytesIO(data))))
+        self.assertEqual(upload.read(), data)
+    @override_settings(TYPE_CONVERTER_MAX_UPLOAD_BYTES=64)
+    def test_oversized_upload_is_rejected(self):
+        with open('./datasets/sample_data.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/', {'file': f})
+        self.assertEqual(response.status_code, 413)
+        response = post_asgi(async_upload_application(None), b'a\n' * 100)
+        self.assertEqual(response[0]['status'], 413)
+    @override_settings(TYPE_CONVERTER_MAX_UPLOAD_BYTES=None)
+    def test_no_cap_by_default(self):
+        handler = HashingUploadHandler()
+        handler.handle_raw_input(None, {}, 50 * 1024 ** 3, b'boundary')
+        self.assertFalse(handler.too_large)
+        response = post_asgi(async_upload_application(None), b'a\n' * 100)
+        self.assertEqual(response[0]['status'], 200)
+
+class AsyncUploadTests(TestCase):
+    def test_incremental_parse_matches_streaming(self):
+        for path in sorted(glob.glob('./datasets/*.csv')):
+            with open(path, 'rb') as f:
+                data = f.read()
+            inference = IncrementalCSVInference()
+            for start in range(0, len(data), 5):
+                inference.feed(data[start:start + 5])
+            inference.feed(b'', final=True)
+            with self.subTest(path=path):
+                self.assertEqual(inference.finish()['types'], infer_file_streaming(io.BytesIO(data), path, [])['types'])
+            inference.close()
+    def test_quoted_newlines_span_blocks(self):
+        inference = IncrementalCSVInference()
+        for data in (b'id,no', b'te\n1,"two\nlines"\n2', b',"x"\n3,y'):
+            inference.feed(data)
+        inference.feed(b'', final=True)
+        result = inference.finish()
+        self.assertEqual(result['rows'], 3)
+        self.assertEqual(list(result['types']), ['id', 'note'])
+    def test_application_routes_uploads(self):
+        application = async_upload_application(None)
+        with open('./datasets/sample_dates.csv', 'rb') as f:
+            sent = post_asgi(application, f.read(), query=b'name=sample_dates.csv&disable=datetime')
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertNotIn('datetime64[ns]', json.loads(sent[1]['body'])['types'].values())
+        self.assertEqual(post_asgi(application, b'a\n1\n', query=b'name=upload.xlsx')[0]['status'], 400)
+        self.assertEqual(post_asgi(application, b'', method='GET')[0]['status'], 405)
+        forwarded = []
+        async def django_application(scope, receive, send):
+            forwarded.append(scope['path'])
+        post_asgi(async_upload_application(django_application), b'', path='/type-detector/types/', method='GET')
+        self.assertEqual(forwarded, ['/type-detector/types/'])
+
+class DistinctCountTests(TestCase):
+    def test_sketch_estimate_and_merge(self):
+        left = HyperLogLog.for_error(0.01)
+        right = HyperLogLog.for_error(0.01)
+        left.update(hash_values(pandas.Series([f'value {i}' for i in range(0, 120000)])))
+        right.update(hash_values(pandas.Series([f'value {i}' for i in range(60000, 180000)])))
+        self.assertAlmostEqual(left.estimate() / 120000, 1, delta=0.03)
+        self.assertAlmostEqual(left.merge(right).estimate() / 180000, 1, delta=0.03)
+    def test_counter_falls_back_to_sketch(self):
+        counter = DistinctCounter(exact_limit=100)
+        counter.update(hash_values(pandas.Series(range(50))))
+        self.assertEqual(counter.bounds(), (50, 50))
+        counter.update(hash_values(pandas.Series(range(5000))))
+        self.assertFalse(counter.is_exact())
+        low, high = counter.bounds()
+        self.assertTrue(low <= 5000 <= high)
+    def test_ambiguous_columns_are_recounted(self):
+        for distinct, expected in ((495, 'category'), (505, 'object')):
+            values = pandas.Series([f'label {i % distinct}' for i in range(1000)])
+            chunks = [pandas.DataFrame({'label': values[start:start + 100]}) for start in range(0, 1000, 100)]
+            accumulator = ColumnAccumulator('label')
+            accumulator.distinct = DistinctCounter(exact_limit=10)
+            for chunk in chunks:
+                accumulator.update(chunk['label'])
+            with self.subTest(distinct=distinct):
+                self.assertTrue(accumulator.needs_exact_count())
+                count_distinct_exact({'label': accumulator}, chunks)
+                self.assertFalse(accumulator.needs_exact_count())
+                self.assertEqual(accumulator.inferred_dtype(), expected)
+                if expected == 'object':
+                    self.assertLess(accumulator.distinct_count, distinct)
+
+class InferenceCacheTests(TestCase):
+    def setUp(self):
+        self.now = 0
+        inference_cache.clear()
+    def clock(self):
+        return self.now
+    def test_key_ignores_hint_order(self):
+        first = cache_key([b'a,b\n1,2\n'], 'data.csv', [['a', 'int8'], ['b', 'object']])
+        second = cache_key([b'a,b\n', b'1,2\n'], 'other.csv', [['b', 'object'], ['a', 'int8']])
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, cache_key([b'a,b\n1,2\n'], 'data.csv', []))
+        self.assertNotEqual(first, cache_key([b'a,b\n1,2\n'], 'data.xlsx', [['a', 'int8'], ['b', 'object']]))
+    def test_lru_eviction(self):
+        cache = InferenceCache(max_entries=2, clock=self.clock)
+        cache.set('a', {'types': {}})
+        cache.set('b', {'types': {}})
+        cache.get('a')
+        cache.set('c', {'types': {}})
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+    def test_memory_bound(self):
+        cache = InferenceCache(max_bytes=100, clock=self.clock)
+        cache.set('a', {'types': {'x': 'a' * 40}})
+        cache.set('b', {'types': {'x': 'b' * 40}})
+        self.assertIsNone(cache.get('a'))
+        self.assertLessEqual(cache.stats()['bytes'], 100)
+    def test_ttl(self):
+        cache = InferenceCache(ttl=10, clock=self.clock)
+        cache.set('a', {'types': {}})
+        self.now = 9
+        self.assertIsNotNone(cache.get('a'))
+        self.now = 10
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+    def test_disk_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            InferenceCache(directory=directory, clock=self.clock).set('a', {'types': {'x': 'int8'}})
+            cache = InferenceCache(directory=directory, clock=self.clock)
+            self.assertEqual(cache.get('a'), {'types': {'x': 'int8'}})
+            self.assertEqual(cache.stats()['disk_hits'], 1)
+    def test_view_serves_repeat_upload_from_cache(self):
+        hits = inference_cache.stats()['hits']
+        for _ in range(2):
+            with open('./datasets/sample_booleans.csv', 'rb') as f:
+                response = self.client.post('/type-detector/inferences/', {'file': f})
+            self.assertEqual(response.json()['types']['bool_col_yesno'], 'boolean')
+        stats = self.client.get('/type-detector/cache/').json()
+        self.assertEqual(stats['hits'], hits + 1)
+        self.assertEqual(stats['entries'], 1)
+
+class InferenceJobTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.original_store = job_queue.store
+        job_queue.store = JobStore(self.directory.name)
+        inference_cache.clear()
+    def tearDown(self):
+        job_queue.store = self.original_store
+        self.directory.cleanup()
+    def wait_for(self, status_url):
+        for _ in range(200):
+            job = self.client.get(status_url).json()
+            if job['status'] in ('done', 'failed'):
+                return job
+            time.sleep(0.05)
+        self.fail('Job did not finish')
+    def test_job_lifecycle(self):
+        with open('./datasets/sample_durations.csv', 'rb') as f:
+            response = self.client.post('/type-detector/jobs/', {'file': f})
+        self.assertEqual(response.status_code, 202)
+        job = self.wait_for(response.json()['status_url'])
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['types']['combined_duration'], 'timedelta64[ns]')
+        self.assertEqual(job['progress']['columns_done'], job['progress']['columns_total'])
+    def test_failed_job(self):
+        response = self.client.post('/type-detector/jobs/', {'file': SimpleUploadedFile('broken.xlsx', b'not a workbook')})
+        job = self.wait_for(response.json()['status_url'])
+        self.assertEqual(job['status'], 'failed')
+        self.assertTrue(job['error'])
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/type-detector/jobs/missing/').status_code, 404)
+    def test_interrupted_jobs_fail_on_restart(self):
+        store = JobStore(self.directory.name)
+        queued = store.create('data.csv', [b'a\n1\n'], {})
+        running = store.create('data.csv', [b'a\n1\n'], {})
+        store.update(running, status='running', pid=2 ** 22 + 1)
+        store.update(queued, pid=2 ** 22 + 1)
+        restarted = JobStore(self.directory.name)
+        for job_id in (queued, running):
+            job = restarted.get(job_id)
+            self.assertEqual(job['status'], 'failed')
+            self.assertEqual(job['error'], JOB_INTERRUPTED_ERROR)
+            self.assertFalse(os.path.exists(restarted.upload_path(job_id, 'data.csv')))
+    def test_live_jobs_survive_restart(self):
+        store = JobStore(self.directory.name)
+        job_id = store.create('data.csv', [b'a\n1\n'], {})
+        self.assertEqual(JobStore(self.directory.name).get(job_id)['status'], 'queued')
+    def test_finished_jobs_expire(self):
+        store = JobStore(self.directory.name, max_age=60)
+        finished = store.create('data.csv', [b'a\n1\n'], {})
+        store.update(finished, status='done', result={'types': {}})
+        waiting = store.create('data.csv', [b'a\n1\n'], {})
+        self.assertEqual(store.purge(now=time.time() + 30), 0)
+        self.assertEqual(store.purge(now=time.time() + 120), 1)
+        self.assertIsNone(store.get(finished))
+        self.assertEqual(store.get(waiting)['status'], 'queued')
+    def test_queue_bound(self):
+        queue = JobQueue(JobStore(self.directory.name), lambda *args: None, max_pending=0)
+        with self.assertRaises(QueueFullError):
+            queue.submit('data.csv', [b'a\n1\n'], {})
+
+class SyntheticDataTests(TestCase):
+    def test_generated_columns_infer_as_expected(self):
+        for options in ({}, {'null_ratio': 0.1}, {'cardinality': 20, 'null_ratio': 0.2}):
+            with self.subTest(**options):
+                buffer = io.StringIO()
+                expected = generate_csv(buffer, 500, 14, **options)
+                buffer.seek(0)
+                dataset = Dataset(name="synthetic", dataframe=pandas.read_csv(buffer), type_hints=[])
+                dtypes = infer_and_convert_data_types(dataset)
+                self.assertEqual({col: str(dtype) for col, dtype in dtypes.items()}, expected)
+
+class BenchmarkCompareTests(TestCase):
+    def test_noise_is_not_a_regression(self):
+        baseline = {'results': {
+            'infer_and_convert_data_types': {'seconds': 1.0, 'runs': [1.0, 1.2]},
+            'detector:duration:col': {'seconds': 0.01, 'runs': [0.01]},
+            'detector:numeric:col': {'seconds': 0.00001, 'runs': [0.00001]},
+        }}
+        current = {'results': {
+            'infer_and_convert_data_types': {'seconds': 1.3, 'runs': [1.05, 1.3]},
+            'detector:duration:col': {'seconds': 0.02, 'runs': [0.02]},
+            'detector:numeric:col': {'seconds': 0.00003, 'runs': [0.00003]},
+        }}
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(compare_benchmarks(current, baseline, 0.1), [])
+            self.assertEqual(compare_benchmarks(current, baseline, 0.1, gate_detectors=True), ['detector:duration:col'])
+            current['results']['infer_and_convert_data_types']['runs'] = [1.2, 1.3]
+            self.assertEqual(compare_benchmarks(current, baseline, 0.1), ['infer_and_convert_data_types'])
+
+class LoadHarnessTests(TestCase):
+    def test_summary_percentiles_and_errors(self):
+        records = [{'name': 'infer', 'status': 200, 'latency': latency / 100} for latency in range(1, 101)]
+        records += [{'name': 'types', 'status': 503, 'latency': 0.5}, {'name': 'types', 'status': None, 'latency': 1.0}]
+        summary = summarize(records, 2.0)
+        self.assertEqual(summary['all']['requests'], 102)
+        self.assertAlmostEqual(summary['infer']['p50'], 0.505)
+        self.assertEqual(summary['infer']['error_rate'], 0.0)
+        self.assertEqual(summary['types']['statuses'], {'503': 1, 'failed': 1})
+        self.assertEqual(summary['types']['throughput'], 1.0)
+    def test_synthetic_schedule(self):
+        requests = synthetic_requests(20, parse_mix('infer=1,types=1'), 10, 3, 2, query='stream=1')
+        self.assertEqual({request['name'] for request in requests}, {'infer', 'types'})
+        self.assertTrue(all(request['path'].endswith('?stream=1') for request in requests if request['name'] == 'infer'))
+        arrivals = schedule(requests, rate=10)
+        self.assertEqual(arrivals[0], 0)
+        self.assertTrue(all(later >= earlier for earlier, later in zip(arrivals, arrivals[1:])))
+        self.assertEqual(schedule(requests), [None] * 20)
+
+class StartupTests(TestCase):
+    def test_api_settings_defer_numeric_stack(self):
+        script = (
+            'import sys, django; django.setup(); from django.urls import resolve; import demo_server.urls, type_converter.asgi; '
+            'print(resolve("/type-detector/types/").url_name, "pandas" in sys.modules, "numpy" in sys.modules)'
+        )
+        environment = dict(os.environ, DJANGO_SETTINGS_MODULE='demo_server.settings_api')
+        completed = subprocess.run([sys.executable, '-c', script], env=environment, capture_output=True, text=True, check=True)
+        self.assertEqual(completed.stdout.split(), ['list_types', 'False', 'False'])
+    def test_warm_up(self):
+        self.assertGreater(warm_up(), 0)
+        with self.assertRaises(ValueError):
+            start_warm_up('eager')
+    def test_parse_importtime(self):
+        stderr = 'import time: self [us] | cumulative | imported package\nimport time:      1500 |       2500 |   pandas.core\nimport time:       500 |       3000 | pandas\n'
+        modules = parse_importtime(stderr)
+        self.assertEqual(modules[0], {'module': 'pandas.core', 'self': 0.0015, 'cumulative': 0.0025})
+        self.assertEqual(package_totals(modules), {'pandas': 0.002})
+
+class InstrumentationTests(TestCase):
+    def test_profile_breakdown(self):
+        with open('./datasets/sample_integers.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/?profile=1', {'file': f})
+        profile = response.json()['profile']
+        columns = {column['column']: column for column in profile['columns']}
+        self.assertEqual(columns['int8_col']['inferred_as'], 'numeric')
+        # Parsed as integers, so no text detector ever sees the column
+        self.assertEqual(columns['int8_col']['stage'], 'block')
+        self.assertEqual(columns['int8_col']['attempts'], [])
+        self.assertIn('parse_seconds', profile)
+    def test_no_profile_by_default(self):
+        with open('./datasets/sample_integers.csv', 'rb') as f:
+            response = self.client.post('/type-detector/inferences/', {'file': f})
+        self.assertNotIn('profile', response.json())
+    def test_metrics_endpoint(self):
+        inference_cache.clear()
+        with open('./datasets/sample_floats.csv', 'rb') as f:
+            self.client.post('/type-detector/inferences/', {'file': f})
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('type_converter_request_seconds_count{view="infer_file",method="POST",status="200"}', body)
+        self.assertIn('type_converter_detector_seconds_bucket{detector="numeric",outcome="hit",le="+Inf"}', body)
+        self.assertIn('type_converter_parse_seconds_count{format="csv"}', body)
+        self.assertIn('type_converter_upload_bytes_count', body)
+        self.assertIn('type_converter_cache_misses', body)
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('test_seconds', 'Test histogram.', (1, 5), labelnames=('kind',), registry=[])
+        for value in (0.5, 2, 10):
+            histogram.observe(value, kind='a')
+        lines = histogram.render().splitlines()
+        self.assertIn('test_seconds_bucket{kind="a",le="1.0"} 1', lines)
+        self.assertIn('test_seconds_bucket{kind="a",le="5.0"} 2', lines)
+        self.assertIn('test_seconds_bucket{kind="a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_sum{kind="a"} 12.5', lines)
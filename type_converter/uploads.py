@@ -0,0 +1,62 @@
+import hashlib
+import logging
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.core.files.uploadhandler import StopUpload
+
+logger = logging.getLogger(__name__)
+
+class HashedUploadedFile(TemporaryUploadedFile):
+    # Filled in while the upload is written, so nothing needs to read it back
+    content_hash = None
+    newline_count = 0
+
+    def row_estimate(self):
+        # Quoted fields may hold newlines and the last row may lack one, hence an estimate
+        return max(self.newline_count - 1, 0)
+
+# Writes each upload to a temporary file exactly once, hashing it and counting its
+# lines on the way, and stops reading the body as soon as it exceeds the size cap
+class HashingUploadHandler(FileUploadHandler):
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = settings.TYPE_CONVERTER_MAX_UPLOAD_BYTES
+        self.digest = None
+        self.received = 0
+        self.too_large = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.too_large = self.max_bytes is not None and content_length > self.max_bytes
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.reject_if_too_large()
+        self.file = HashedUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        self.too_large = self.max_bytes is not None and self.received > self.max_bytes
+        self.reject_if_too_large()
+        self.file.write(raw_data)
+        self.digest.update(raw_data)
+        self.file.newline_count += raw_data.count(b'\n')
+
+    def reject_if_too_large(self):
+        if self.too_large:
+            logger.warning('Rejecting upload %s above %d bytes', self.file_name, self.max_bytes)
+            if self.request is not None:
+                self.request.upload_too_large = True
+            raise StopUpload(connection_reset=True)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_hash = self.digest.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
@@ -1,8 +1,18 @@
 from django.urls import path
 from .views import infer_file
+from .views import preview_file
 from .views import list_types
+from .views import cache_stats
+from .views import list_detectors
+from .views import create_job
+from .views import job_status
 
 urlpatterns = [
     path('inferences/', infer_file, name='infer_file'),
+    path('previews/', preview_file, name='preview_file'),
     path('types/', list_types, name='list_types'),
+    path('cache/', cache_stats, name='cache_stats'),
+    path('detectors/', list_detectors, name='list_detectors'),
+    path('jobs/', create_job, name='create_job'),
+    path('jobs/<str:job_id>/', job_status, name='job_status'),
 ]
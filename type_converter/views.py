@@ -1,23 +1,76 @@
+import os
+import time
+import tempfile
 import logging
 import json
+from contextlib import contextmanager
+from django.conf import settings
+from django.http import HttpResponse
 from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from .models import Dataset
-from .services import infer_and_convert_data_types
-import pandas
+from .cache import InferenceCache
+from .cache import cache_key
+from .cache import cache_key_for_hash
+from .cache import content_hash
+from .excel import ExcelUnavailableError
+from .excel import WorkbookSelectionError
+from .excel import infer_workbook
+from .excel import is_xls
+from .excel import read_sheet_head
+from .excel import sheet_column_counts
+from .excel import sheet_names
+from .export import EXPORT_CONTENT_TYPES
+from .export import ExportUnavailableError
+from .export import load_pyarrow
+from .export import stream_dataframe
+from .metrics import PARSE_SECONDS
+from .metrics import UPLOAD_BYTES
+from .metrics import render_gauges
+from .metrics import render_metrics
+from .jobs import JOB_DONE
+from .jobs import JOB_FAILED
+from .jobs import JOB_MAX_AGE
+from .jobs import JOB_QUEUED
+from .jobs import JobQueue
+from .jobs import JobStore
+from .jobs import QueueFullError
+from .parsing import read_csv
+from .scheduler import SchedulerFullError
+from .scheduler import inference_scheduler
 
 logger = logging.getLogger(__name__)
 
-@csrf_exempt
-@require_POST
-def infer_file(request):
-    logger.debug('In infer_file')
-    logger.debug('Request method: %s', request.method)
+# pandas, numpy and the detectors are imported inside the views that use them, so a
+# new worker can serve requests before the numeric stack has loaded (see warmup.py)
+
+# CSV uploads above this size are inferred chunk by chunk instead of in memory
+STREAMING_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+# Seconds clients are asked to wait before retrying a rejected job
+JOB_RETRY_AFTER_SECONDS = 30
+
+# Seconds clients are asked to wait when the inference scheduler is saturated
+INFERENCE_RETRY_AFTER_SECONDS = 5
+
+inference_cache = InferenceCache(**settings.TYPE_CONVERTER_CACHE)
+inference_scheduler.configure(**settings.TYPE_CONVERTER_SCHEDULER)
 
-    if 'file' not in request.FILES:
+def is_flag_set(request, name):
+    value = request.GET.get(name, request.POST.get(name))
+    return value is not None and value.lower() in ('1', 'true', 'yes')
+
+def read_upload(request):
+    # Reading FILES runs the upload handlers, which flag bodies over the size cap
+    files = request.FILES
+    if getattr(request, 'upload_too_large', False):
+        return None, None, JsonResponse({'error': f'File too large. Uploads are limited to {settings.TYPE_CONVERTER_MAX_UPLOAD_BYTES} bytes.'}, status=413)
+    if 'file' not in files:
         logger.error('No file provided in request')
-        return JsonResponse({ 'error': 'No file provided'}, status=400)
+        return None, None, JsonResponse({ 'error': 'No file provided'}, status=400)
     
     # Processing any user-defined type mappings
     mappings = []
@@ -30,7 +83,7 @@ def infer_file(request):
             mappings = [item for item in mappings if item[1] is not None]
             logger.info(f"Received {len(mappings)} type mappings")
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+            return None, None, JsonResponse({'error': 'Invalid JSON data'}, status=400)
 
     file_obj = request.FILES['file']
     file_name = file_obj.name
@@ -39,34 +92,535 @@ def infer_file(request):
     # Preliminary validation based on file extension
     if not (file_name.endswith('.csv') or file_name.endswith('.xls') or file_name.endswith('.xlsx')): 
         logger.error('Invalid file format for file: %s', file_name)
-        return JsonResponse({'error': 'Invalid file format. Only CSV and Excel files are allowed.'}, status=400)
+        return None, None, JsonResponse({'error': 'Invalid file format. Only CSV and Excel files are allowed.'}, status=400)
 
-    # Comprehensive validation using pandas
+    return file_obj, mappings, None
+
+def read_sampling(request):
+    if not is_flag_set(request, 'sample'):
+        return None, None
+
+    sampling = dict(settings.TYPE_CONVERTER_SAMPLING)
     try:
-        if file_name.endswith('.csv'):
-            df = pandas.read_csv(file_obj)
-        else:
-            df = pandas.read_excel(file_obj)
+        for name, parse in (('sample_size', int), ('confidence', float)):
+            value = request.GET.get(name, request.POST.get(name))
+            if value is not None:
+                sampling[name] = parse(value)
+    except ValueError:
+        return None, JsonResponse({'error': 'Invalid sampling options'}, status=400)
+
+    if sampling['sample_size'] < 1 or not 0 < sampling['confidence'] <= 1:
+        return None, JsonResponse({'error': 'sample_size must be positive and confidence between 0 and 1'}, status=400)
+    return sampling, None
+
+def read_disabled_detectors(request):
+    return parse_disabled_detectors(request.GET.get('disable', request.POST.get('disable')))
 
-        uploaded_dataset = Dataset(name=file_name, dataframe=df, type_hints=mappings)
+def parse_disabled_detectors(value):
+    if not value:
+        return [], None
+
+    from .services import detector_registry
+
+    disabled = sorted({name.strip() for name in value.split(',') if name.strip()})
+    unknown = [name for name in disabled if name not in detector_registry.names()]
+    if unknown:
+        return None, JsonResponse({'error': f"Unknown detectors: {', '.join(unknown)}"}, status=400)
+    return disabled, None
+
+def read_workbook_selection(request):
+    selection = []
+    for name in ('sheets', 'columns'):
+        value = request.GET.get(name, request.POST.get(name))
+        selection.append([item.strip() for item in value.split(',') if item.strip()] if value else None)
+    return selection
+
+def default_na_values(na_values=None):
+    return list(settings.TYPE_CONVERTER_NA_VALUES) if na_values is None else na_values
+
+def read_na_values(request):
+    return parse_na_values(request.GET.get('na_values', request.POST.get('na_values')))
+
+def parse_na_values(value):
+    # Comma-separated entries read as missing values, empty for pandas' own NA tokens only
+    if value is None:
+        return default_na_values()
+    return sorted({item.strip() for item in value.split(',') if item.strip()})
+
+def upload_hash(file_obj):
+    # Uploads spooled by HashingUploadHandler were hashed as they were written
+    if getattr(file_obj, 'content_hash', None) is not None:
+        return file_obj.content_hash
+    digest = content_hash(file_obj.chunks())
+    file_obj.seek(0)
+    return digest
+
+def read_dataframe(file_obj, file_name, na_values=None):
+    import pandas
+
+    na_values = default_na_values(na_values)
+    started = time.perf_counter()
+    # Spooled uploads are memory-mapped by the C parser instead of read through the file object
+    if hasattr(file_obj, 'temporary_file_path'):
+        file_obj = file_obj.temporary_file_path()
+    if file_name.endswith('.csv'):
+        df = read_csv(
+            file_obj, na_values, engine=settings.TYPE_CONVERTER_CSV_ENGINE, memory_map=isinstance(file_obj, str) and os.path.getsize(file_obj) > 0,
+        )
+        PARSE_SECONDS.observe(time.perf_counter() - started, format='csv')
+    else:
+        df = pandas.read_excel(file_obj, na_values=list(na_values))
+        PARSE_SECONDS.observe(time.perf_counter() - started, format='excel')
+    return df
+
+@csrf_exempt
+@require_POST
+def infer_file(request):
+    logger.debug('In infer_file')
+    logger.debug('Request method: %s', request.method)
+
+    file_obj, mappings, error_response = read_upload(request)
+    if error_response is not None:
+        return error_response
+    file_name = file_obj.name
+    UPLOAD_BYTES.observe(file_obj.size)
+    if hasattr(file_obj, 'row_estimate'):
+        logger.info('Upload %s holds %d bytes and about %d rows', file_name, file_obj.size, file_obj.row_estimate())
+
+    sampling, error_response = read_sampling(request)
+    if error_response is not None:
+        return error_response
+
+    export_format, error_response = read_export_format(request)
+    if error_response is not None:
+        return error_response
+
+    disabled, error_response = read_disabled_detectors(request)
+    if error_response is not None:
+        return error_response
+
+    sheets, columns = read_workbook_selection(request)
+    na_values = read_na_values(request)
+
+    # A profiled request always does the work so there is something to measure
+    profile = {'columns': []} if is_flag_set(request, 'profile') else None
+
+    optimize_memory = is_flag_set(request, 'optimize')
+    key = cache_key_for_hash(
+        upload_hash(file_obj), file_name, mappings,
+        {'sampling': sampling, 'optimize_memory': optimize_memory, 'disabled': disabled, 'sheets': sheets, 'columns': columns, 'na_values': na_values},
+    )
+    # Exports need the converted data itself, which is never cached
+    cached = inference_cache.get(key) if profile is None and export_format is None else None
+    if cached is not None:
+        logger.info('Serving cached inference for file: %s', file_name)
+        return inference_response(file_name, cached)
+
+    # Exports are built from the converted DataFrame, so they always take the in-memory path
+    if file_name.endswith('.csv') and export_format is None and (is_flag_set(request, 'stream') or file_obj.size > STREAMING_THRESHOLD_BYTES):
+        started = time.perf_counter()
+        try:
+            result = infer_file_streaming(file_obj, file_name, mappings, optimize_memory=optimize_memory, disabled=disabled, na_values=na_values)
+        except Exception as e:
+            logger.exception('An error occurred while processing the file: %s', str(e))
+            return JsonResponse({'error': f'Invalid file content. Could not process file: {str(e)}'}, status=400)
+        if profile is not None:
+            profile['streaming_seconds'] = time.perf_counter() - started
+        inference_cache.set(key, result)
+        return inference_response(file_name, result, profile)
+
+    # Workbooks are read row by row, every selected sheet in parallel
+    if not file_name.endswith('.csv') and export_format is None:
+        started = time.perf_counter()
+        try:
+            result = infer_excel_file(
+                file_obj, file_name, mappings, sheets, columns, optimize_memory=optimize_memory, disabled=disabled, na_values=na_values,
+            )
+        except WorkbookSelectionError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except ExcelUnavailableError as e:
+            return JsonResponse({'error': str(e)}, status=501)
+        except SchedulerFullError as e:
+            return scheduler_full_response(e)
+        except Exception as e:
+            logger.exception('An error occurred while processing the file: %s', str(e))
+            return JsonResponse({'error': f'Invalid file content. Could not process file: {str(e)}'}, status=400)
+        if profile is not None:
+            profile['streaming_seconds'] = time.perf_counter() - started
+        inference_cache.set(key, result)
+        return inference_response(file_name, result, profile)
+
+    # Comprehensive validation using pandas
+    started = time.perf_counter()
+    try:
+        df = read_dataframe(file_obj, file_name, na_values)
         logger.info('Successfully parsed the file.')
     except Exception as e:
         logger.exception('An error occurred while processing the file: %s', str(e))
         return JsonResponse({'error': f'Invalid file content. Could not process file: {str(e)}'}, status=400)
 
+    parsed = time.perf_counter()
+    try:
+        result, df = infer_dataframe(
+            df, file_name, mappings, profile=profile['columns'] if profile is not None else None, sampling=sampling, optimize_memory=optimize_memory,
+            disabled=disabled,
+        )
+    except SchedulerFullError as e:
+        return scheduler_full_response(e)
+    if profile is not None:
+        profile['parse_seconds'] = parsed - started
+        profile['inference_seconds'] = time.perf_counter() - parsed
+    inference_cache.set(key, result)
+
+    if export_format is not None:
+        return export_response(df, file_name, export_format)
+    return inference_response(file_name, result, profile)
+
+def read_preview_rows(request):
+    value = request.GET.get('rows', request.POST.get('rows'))
+    if value is None:
+        return settings.TYPE_CONVERTER_PREVIEW['rows'], None
+    try:
+        rows = int(value)
+    except ValueError:
+        rows = 0
+    if rows < 1:
+        return None, JsonResponse({'error': 'rows must be a positive integer'}, status=400)
+    return rows, None
+
+@csrf_exempt
+@require_POST
+def preview_file(request):
+    from .preview import preview_csv
+    from .preview import preview_types
+
+    logger.debug('In preview_file')
+
+    file_obj, _, error_response = read_upload(request)
+    if error_response is None:
+        rows, error_response = read_preview_rows(request)
+    if error_response is None:
+        disabled, error_response = read_disabled_detectors(request)
+    if error_response is not None:
+        return error_response
+    file_name = file_obj.name
+    sheets, _ = read_workbook_selection(request)
+    na_values = read_na_values(request)
+
+    sheet = None
+    try:
+        if file_name.endswith('.csv'):
+            # Only the head of the upload is read. Clients may also send just the head and say so with ?partial=1
+            max_bytes = settings.TYPE_CONVERTER_PREVIEW['max_bytes']
+            truncated = file_obj.size > max_bytes or is_flag_set(request, 'partial')
+            df, complete = preview_csv(file_obj.read(max_bytes), rows, is_flag_set(request, 'spread'), truncated, na_values)
+            erroneous_entries = ()
+        else:
+            with upload_path(file_obj, file_name) as path:
+                sheet, df, complete = read_sheet_head(path, sheets[0] if sheets else None, is_xls(file_name), rows)
+            erroneous_entries = na_values
+        result = preview_types(df, disabled, complete, erroneous_entries)
+    except WorkbookSelectionError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except ExcelUnavailableError as e:
+        return JsonResponse({'error': str(e)}, status=501)
+    except Exception as e:
+        logger.exception('An error occurred while previewing the file: %s', str(e))
+        return JsonResponse({'error': f'Invalid file content. Could not process file: {str(e)}'}, status=400)
+
+    response = {'file_name': file_name, **result}
+    if sheet is not None:
+        response['sheet'] = sheet
+    return JsonResponse(response, status=200)
+
+def read_export_format(request):
+    export_format = request.GET.get('format', request.POST.get('format'))
+    if export_format is None:
+        return None, None
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return None, JsonResponse({'error': f"Unknown export format. Use one of: {', '.join(sorted(EXPORT_CONTENT_TYPES))}"}, status=400)
+    try:
+        load_pyarrow()
+    except ExportUnavailableError as e:
+        return None, JsonResponse({'error': str(e)}, status=501)
+    return export_format, None
+
+def export_response(df, file_name, export_format):
+    response = StreamingHttpResponse(stream_dataframe(df, export_format), content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{os.path.splitext(file_name)[0]}.{export_format}"'
+    return response
+
+def infer_dataframe(df, file_name, mappings, on_column=None, profile=None, sampling=None, optimize_memory=False, disabled=()):
+    from .services import infer_and_convert_data_types
+
+    uploaded_dataset = Dataset(name=file_name, dataframe=df, type_hints=mappings)
+
     row_count, column_count = uploaded_dataset.size()
     logger.info('File contains %d rows and %d columns.', row_count, column_count)
 
-    dtypes = infer_and_convert_data_types(uploaded_dataset)
+    infer_and_convert_data_types(
+        uploaded_dataset,
+        backend=settings.TYPE_CONVERTER_EXECUTION_BACKEND,
+        on_column=on_column,
+        profile=profile,
+        sampling=sampling,
+        optimize_memory=optimize_memory,
+        disabled_detectors=disabled,
+        # read_dataframe already turned the erroneous entries into missing values
+        erroneous_entries=(),
+    )
+    # The converted columns come back as a new frame, the upload's own is left as parsed
+    df = uploaded_dataset.dataframe
     dtypes_dict = {col: str(dtype) for col, dtype in df.dtypes.items()}
 
+    result = {
+        'rows': row_count,
+        'columns': column_count,
+        'types': dtypes_dict,
+        'datetime_formats': {str(col): fmt for col, fmt in uploaded_dataset.datetime_formats.items()},
+    }
+    if optimize_memory:
+        result['memory_usage'] = {str(col): usage for col, usage in uploaded_dataset.memory_usage.items()}
+    return result, df
+
+def scheduler_full_response(error):
+    logger.warning('Rejecting inference: %s', str(error))
+    response = JsonResponse({'error': 'Too many inferences in progress. Try again later.'}, status=503)
+    response['Retry-After'] = str(INFERENCE_RETRY_AFTER_SECONDS)
+    return response
+
+def retry_while_scheduler_full(infer, file_name):
+    # Jobs are already queued, so they wait for the scheduler rather than fail
+    while True:
+        try:
+            return infer()
+        except SchedulerFullError:
+            logger.info('Inference scheduler is full, job for file %s retries shortly', file_name)
+            time.sleep(INFERENCE_RETRY_AFTER_SECONDS)
+
+def run_inference_job(path, file_name, options, on_column):
+    mappings = options['mappings']
+    sampling = options.get('sampling')
+    optimize_memory = options.get('optimize_memory', False)
+    disabled = options.get('disabled', [])
+    sheets = options.get('sheets')
+    columns = options.get('columns')
+    na_values = default_na_values(options.get('na_values'))
+
+    with open(path, 'rb') as file_obj:
+        key_options = {
+            'sampling': sampling, 'optimize_memory': optimize_memory, 'disabled': disabled, 'sheets': sheets, 'columns': columns, 'na_values': na_values,
+        }
+        if options.get('content_hash') is not None:
+            key = cache_key_for_hash(options['content_hash'], file_name, mappings, key_options)
+        else:
+            key = cache_key(iter(lambda: file_obj.read(1024 * 1024), b''), file_name, mappings, key_options)
+        cached = inference_cache.get(key)
+        if cached is not None:
+            logger.info('Serving cached inference for file: %s', file_name)
+            return cached
+
+        file_obj.seek(0)
+        if file_name.endswith('.csv') and (options['stream'] or os.path.getsize(path) > STREAMING_THRESHOLD_BYTES):
+            result = infer_file_streaming(
+                file_obj, file_name, mappings, optimize_memory=optimize_memory, disabled=disabled, na_values=na_values, on_column=on_column,
+            )
+        elif not file_name.endswith('.csv'):
+            result = retry_while_scheduler_full(lambda: infer_excel_path(
+                path, file_name, mappings, sheets, columns, optimize_memory=optimize_memory, disabled=disabled, na_values=na_values,
+                on_column=on_column,
+            ), file_name)
+        else:
+            result, _ = retry_while_scheduler_full(lambda: infer_dataframe(
+                read_dataframe(path, file_name, na_values), file_name, mappings, on_column=on_column, sampling=sampling,
+                optimize_memory=optimize_memory, disabled=disabled,
+            ), file_name)
+
+    inference_cache.set(key, result)
+    return result
+
+job_queue = JobQueue(
+    JobStore(settings.TYPE_CONVERTER_JOBS['directory'], max_age=settings.TYPE_CONVERTER_JOBS.get('max_age', JOB_MAX_AGE)),
+    run_inference_job,
+    workers=settings.TYPE_CONVERTER_JOBS['workers'],
+    max_pending=settings.TYPE_CONVERTER_JOBS['max_pending'],
+)
+
+@csrf_exempt
+@require_POST
+def create_job(request):
+    logger.debug('In create_job')
+
+    file_obj, mappings, error_response = read_upload(request)
+    if error_response is None:
+        sampling, error_response = read_sampling(request)
+    if error_response is None:
+        disabled, error_response = read_disabled_detectors(request)
+    if error_response is not None:
+        return error_response
+
+    sheets, columns = read_workbook_selection(request)
+    options = {
+        'mappings': mappings,
+        'stream': is_flag_set(request, 'stream'),
+        'sampling': sampling,
+        'optimize_memory': is_flag_set(request, 'optimize'),
+        'disabled': disabled,
+        'sheets': sheets,
+        'columns': columns,
+        'na_values': read_na_values(request),
+        'content_hash': upload_hash(file_obj),
+    }
+    try:
+        job_id = job_queue.submit(file_obj.name, file_obj.chunks(), options)
+    except QueueFullError as e:
+        logger.warning('Rejecting inference job: %s', str(e))
+        response = JsonResponse({'error': 'Too many inference jobs in progress. Try again later.'}, status=503)
+        response['Retry-After'] = str(JOB_RETRY_AFTER_SECONDS)
+        return response
+
     return JsonResponse({
+        'job_id': job_id,
+        'status': JOB_QUEUED,
+        'status_url': reverse('job_status', args=[job_id]),
+    }, status=202)
+
+def job_status(request, job_id):
+    if request.method != 'GET':
+        logger.warning('Non-GET request methods are not allowed')
+        return JsonResponse({'error': 'Only GET requests are allowed'}, status=405)
+
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return JsonResponse({'error': 'Unknown job'}, status=404)
+
+    response = {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'file_name': job['file_name'],
+        'progress': job['progress'],
+    }
+    if job['status'] == JOB_DONE:
+        response.update(job['result'])
+    elif job['status'] == JOB_FAILED:
+        response['error'] = job['error']
+
+    return JsonResponse(response, status=200)
+
+def infer_file_streaming(file_obj, file_name, mappings, optimize_memory=False, disabled=(), na_values=None, on_column=None):
+    from .streaming import infer_streaming_dtypes
+    from .streaming import read_csv_chunks
+
+    na_values = default_na_values(na_values)
+    logger.info('Streaming inference for file: %s', file_name)
+
+    # The parser reads the erroneous entries as missing, the accumulators need not look for them
+    accumulators = infer_streaming_dtypes(
+        read_csv_chunks(file_obj, na_values=na_values), type_hints=mappings, disabled_detectors=disabled,
+        distinct_error=settings.TYPE_CONVERTER_DISTINCT_ERROR, erroneous_entries=(),
+    )
+    return summarize_accumulators(accumulators, file_obj, optimize_memory, na_values, on_column)
+
+@contextmanager
+def upload_path(file_obj, file_name):
+    if hasattr(file_obj, 'temporary_file_path'):
+        yield file_obj.temporary_file_path()
+        return
+
+    # Uploads kept in memory are written out once, the readers and worker processes need a path
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(file_name)[1]) as f:
+        for chunk in file_obj.chunks():
+            f.write(chunk)
+        f.flush()
+        yield f.name
+
+def infer_excel_file(file_obj, file_name, mappings, sheets=None, columns=None, optimize_memory=False, disabled=(), na_values=None):
+    with upload_path(file_obj, file_name) as path:
+        return infer_excel_path(path, file_name, mappings, sheets, columns, optimize_memory, disabled, na_values)
+
+def infer_excel_path(
+    path, file_name, mappings, sheets=None, columns=None, optimize_memory=False, disabled=(), na_values=None, on_column=None,
+):
+    logger.info('Streaming inference for workbook: %s', file_name)
+    started = time.perf_counter()
+
+    on_sheet = None
+    if on_column is not None:
+        # Unknown sheets are left for infer_workbook to report
+        available = sheet_names(path, is_xls(file_name))
+        selected = available if sheets is None else [sheet for sheet in sheets if sheet in available]
+        total = sum(sheet_column_counts(path, selected, columns, is_xls(file_name)).values())
+        done = [0]
+
+        def on_sheet(sheet, result):
+            # A sheet's columns are reported once it finishes, named after the sheet when
+            # there are several so equal column names do not collide
+            for col, dtype in result['types'].items():
+                done[0] += 1
+                on_column(col if len(selected) == 1 else f'{sheet}/{col}', dtype, done[0], total)
+
+    results = infer_workbook(
+        path, is_xls(file_name), sheets, columns, mappings, disabled, settings.TYPE_CONVERTER_DISTINCT_ERROR, optimize_memory,
+        default_na_values(na_values), on_sheet,
+    )
+    PARSE_SECONDS.observe(time.perf_counter() - started, format='excel')
+
+    # The first selected sheet also fills the top-level fields, as a single-sheet upload always did
+    return {**next(iter(results.values())), 'sheets': results}
+
+def summarize_accumulators(accumulators, file_obj, optimize_memory=False, na_values=None, on_column=None):
+    from .streaming import read_csv_chunks
+    from .streaming import streaming_result
+
+    def read_columns(positions):
+        file_obj.seek(0)
+        return read_csv_chunks(file_obj, usecols=positions, na_values=default_na_values(na_values))
+    return streaming_result(accumulators, read_columns, optimize_memory, on_column)
+
+def inference_response(file_name, result, profile=None):
+    response = {
         'message': 'File uploaded successfully',
         'file_name': file_name,
-        'rows': row_count,
-        'columns': column_count,
-        'types': dtypes_dict
-    }, status=200)
+        'rows': result['rows'],
+        'columns': result['columns'],
+        'types': result['types'],
+        'datetime_formats': result['datetime_formats'],
+    }
+    if 'memory_usage' in result:
+        response['memory_usage'] = result['memory_usage']
+    if 'sheets' in result:
+        response['sheets'] = result['sheets']
+    if profile is not None:
+        response['profile'] = profile
+
+    return JsonResponse(response, status=200)
+
+def cache_stats(request):
+    if request.method != 'GET':
+        logger.warning('Non-GET request methods are not allowed')
+        return JsonResponse({'error': 'Only GET requests are allowed'}, status=405)
+
+    return JsonResponse(inference_cache.stats(), status=200)
+
+def list_detectors(request):
+    if request.method != 'GET':
+        logger.warning('Non-GET request methods are not allowed')
+        return JsonResponse({'error': 'Only GET requests are allowed'}, status=405)
+
+    from .services import detector_registry
+    return JsonResponse(detector_registry.describe(), status=200)
+
+def metrics(request):
+    if request.method != 'GET':
+        logger.warning('Non-GET request methods are not allowed')
+        return JsonResponse({'error': 'Only GET requests are allowed'}, status=405)
+
+    body = '\n'.join([
+        render_metrics(),
+        render_gauges('type_converter_cache', 'Inference cache counter.', inference_cache.stats()),
+        render_gauges('type_converter_scheduler', 'Inference scheduler queue and worker counter.', inference_scheduler.stats()),
+    ])
+    return HttpResponse(body + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
 
 def list_types(request):
     logger.debug('In list_types')
@@ -0,0 +1,55 @@
+import time
+import logging
+import importlib
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_BACKGROUND = 'background'
+WARM_UP_BLOCKING = 'blocking'
+
+# Modules the views import on first use, in dependency order
+HEAVY_MODULES = ['numpy', 'pandas', 'type_converter.services', 'type_converter.streaming', 'type_converter.preview']
+
+# One value per detector, so the warm-up run touches every parser the first upload would
+WARM_UP_COLUMNS = {
+    'boolean': ['yes', 'no'],
+    'duration': ['3 days', '2 hours'],
+    'datetime': ['2024-01-31', '2024-02-29'],
+    'numeric': ['1', '2.5'],
+    'complex': ['1+2j', '3-4j'],
+    'text': ['a', 'b'],
+}
+
+_warm_up_thread = None
+
+def warm_up():
+    started = time.perf_counter()
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+
+    import pandas as pd
+    from .services import profile_series
+    # profile_series leaves the detector statistics alone, so this does not skew the order
+    df = pd.DataFrame(WARM_UP_COLUMNS)
+    for col in df.columns:
+        profile_series(df, col)
+
+    seconds = time.perf_counter() - started
+    logger.info('Warmed up in %.3fs', seconds)
+    return seconds
+
+def start_warm_up(mode=None):
+    # Called by the WSGI and ASGI entry points once Django is set up
+    global _warm_up_thread
+    mode = settings.TYPE_CONVERTER_WARM_UP if mode is None else mode
+    if mode == WARM_UP_BLOCKING:
+        warm_up()
+    elif mode == WARM_UP_BACKGROUND and _warm_up_thread is None:
+        # Requests arriving meanwhile wait on the import lock, never on a second import
+        _warm_up_thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+        _warm_up_thread.start()
+    elif mode not in (WARM_UP_BACKGROUND, WARM_UP_BLOCKING, None):
+        raise ValueError(f"Unknown warm-up mode: {mode}")
+    return _warm_up_thread